@@ -0,0 +1,95 @@
+"""Size-bounded, content-addressed file stores."""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+
+class DiskStore:
+    """Directory of content-addressed files with atomic writes and LRU eviction.
+
+    Files are written through a temporary file and os.replace, so concurrent jobs
+    sharing the directory never read partial files. Reads touch the file's mtime,
+    which eviction uses as the recency order.
+    """
+
+    def __init__(self, path: Path, max_gb: float = 10, suffix: str = ""):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_gb = max_gb
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def file(self, key: str) -> Path:
+        """Return the path of the file stored under a key."""
+        return self.path / f"{key}{self.suffix}"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the path for a key if it is stored, counting the hit or miss."""
+        path = self.file(key)
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def write(self, key: str, writer: Callable[[BinaryIO], None]) -> Path:
+        """Atomically write a file under a key with writer(f), then evict if over budget."""
+        path = self.file(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                writer(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict(keep=path.name)
+        return path
+
+    def files(self) -> list:
+        """Return (mtime, size, path) of the stored files, least recently used first."""
+        files = []
+        for path in self.path.glob(f"*{self.suffix}"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Evicted by a concurrent job
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return sorted(files)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used files until the store fits within max_gb."""
+        files = self.files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total / 1e9 <= self.max_gb:
+                break
+            if path.name == keep:
+                continue
+            try:
+                path.unlink()
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the current store size."""
+        files = self.files()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "files": len(files),
+            "gb": sum(size for _, size, _ in files) / 1e9,
+        }
@@ -1,11 +1,61 @@
+"""Estimation methods, imported on first use so that importing est does not start R."""
+
+import functools
+import importlib
 import warnings
-from rpy2.robjects import pandas2ri
 
-from nostocalean.est.fixest import feols, feglm, reg, treg, preg
+# Attribute -> (module, R package it needs, numpy fallback module)
+_METHODS = {
+    "feols_many": ("batch", None, None),
+    "result_cache": ("memo", None, None),
+    "conversion_cache": ("cache", "fixest", None),
+    **{
+        name: ("fixest", "fixest", "numpy_fixest")
+        for name in ["feols", "reg", "treg", "preg"]
+    },
+    "feglm": ("fixest", "fixest", None),
+    **{
+        name: ("did", "did", "numpy_did")
+        for name in ["att_gt", "did", "es", "pdid", "pes"]
+    },
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _load(module: str, package: str, fallback: str):
+    """Import an R-backed module, falling back to its numpy engine if R is unavailable."""
+    # pylint: disable=import-outside-toplevel
+    try:
+        from rpy2.robjects import packages, pandas2ri
+
+        if not packages.isinstalled(package):
+            raise ImportError(f"R package {package} is not installed")
+        loaded = importlib.import_module(f"{__name__}.{module}")
+        pandas2ri.activate()
+        return loaded
+    except Exception:  # pylint: disable=broad-except
+        if fallback is None:
+            raise
+        warnings.warn(
+            f"Failed to load {package} methods, falling back to the numpy engine"
+        )
+        return importlib.import_module(f"{__name__}.{fallback}")
+
+
+def __getattr__(name: str):
+    if name not in _METHODS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, package, fallback = _METHODS[name]
+    if package is None:
+        loaded = importlib.import_module(f"{__name__}.{module}")
+    else:
+        loaded = _load(module, package, fallback)
+    # Bind every method of the module, replacing submodule attributes such as est.did
+    for other, spec in _METHODS.items():
+        if spec == _METHODS[name]:
+            globals()[other] = getattr(loaded, other)
+    return globals()[name]
 
-try:
-    from nostocalean.est.did import att_gt, did, es, pdid, pes
-except:
-    warnings.warn("Failed to load did methods")
 
-pandas2ri.activate()
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(_METHODS))
@@ -0,0 +1,90 @@
+"""Methods for estimating many feols specifications at once."""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from nostocalean.est import numpy_fixest
+
+
+def group_specs(
+    fmls: List[str], data: pd.DataFrame, **kwargs
+) -> Dict[Tuple, List[str]]:
+    """Group specifications by their fixed effects and complete-case sample."""
+    notna: Dict[str, np.ndarray] = {}
+    groups: Dict[Tuple, List[str]] = {}
+    for fml in fmls:
+        columns = numpy_fixest.sample_columns(fml, kwargs)
+        for column in columns:
+            if column not in notna:
+                notna[column] = data[column].notna().to_numpy()
+        mask = np.logical_and.reduce([notna[column] for column in columns])
+        fixef = fml.split("|")[1].replace(" ", "") if "|" in fml else ""
+        groups.setdefault((fixef, np.packbits(mask).tobytes()), []).append(fml)
+    return groups
+
+
+def _group_sample(fmls: List[str], data: pd.DataFrame, kwargs: dict) -> pd.DataFrame:
+    """Return the shared sample of a group of specifications."""
+    columns = sorted(
+        {c for fml in fmls for c in numpy_fixest.sample_columns(fml, kwargs)}
+    )
+    return data[columns].dropna()
+
+
+def _fit_numpy(
+    fmls: List[str], sample: pd.DataFrame, kwargs: dict
+) -> Dict[str, pd.DataFrame]:
+    """Fit a group of specifications with the numpy engine and return their tables."""
+    results = numpy_fixest.feols_many(fmls, sample, **kwargs)
+    return {fml: result.get_table() for fml, result in results.items()}
+
+
+def _fit_fixest(
+    fmls: List[str], sample: pd.DataFrame, kwargs: dict
+) -> Dict[str, pd.DataFrame]:
+    """Fit a group of specifications in R, converting the shared sample once."""
+    # pylint: disable=import-outside-toplevel
+    from nostocalean.est.cache import conversion_cache
+    from nostocalean.est.fixest import feols
+
+    r_data = conversion_cache.get(sample, list(sample.columns))
+    return {fml: feols(fml, r_data, **dict(kwargs)).get_table() for fml in fmls}
+
+
+def feols_many(
+    fmls: List[str],
+    data: pd.DataFrame,
+    engine: str = "numpy",
+    n_jobs: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Estimate many feols specifications and return a coefficient table stacked by spec.
+
+    Specifications sharing fixed effects and a sample are fitted together, so the data
+    is selected (and converted to R) once and each variable is demeaned once. With the
+    numpy engine independent groups are fitted in a process pool of n_jobs workers.
+    """
+    groups = list(group_specs(fmls, data, **kwargs).values())
+    samples = [_group_sample(group, data, kwargs) for group in groups]
+
+    if engine == "fixest":
+        tables = [
+            _fit_fixest(group, sample, kwargs) for group, sample in zip(groups, samples)
+        ]
+    elif engine != "numpy":
+        raise ValueError(f"Unknown engine {engine!r}.")
+    elif len(groups) == 1 or n_jobs == 1:
+        tables = [
+            _fit_numpy(group, sample, kwargs) for group, sample in zip(groups, samples)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            tables = list(pool.map(_fit_numpy, groups, samples, [kwargs] * len(groups)))
+
+    tables = {fml: table for group in tables for fml, table in group.items()}
+    return pd.concat(
+        [tables[fml] for fml in fmls], keys=fmls, names=["spec", "coefficient"]
+    )
@@ -0,0 +1,69 @@
+"""Cache for pandas to R data.frame conversions."""
+
+from collections import OrderedDict
+from typing import Dict, List
+
+import pandas as pd
+from rpy2 import robjects
+
+from nostocalean import rtransfer
+from nostocalean.functions import fingerprint
+
+
+class ConversionCache:
+    """LRU cache of converted R data.frames keyed by a fingerprint of the selected columns."""
+
+    def __init__(self, max_gb: float = 1.0):
+        self.max_gb = max_gb
+        self.entries: "OrderedDict[str, robjects.DataFrame]" = OrderedDict()
+        self.sizes: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def gb(self) -> float:
+        """Get the estimated size (in GB) of the cached frames."""
+        return sum(self.sizes.values())
+
+    def get(
+        self, data: pd.DataFrame, columns: List[str], columnar: bool = False
+    ) -> robjects.DataFrame:
+        """Return the R data.frame for data[columns] without missing values, converting on a miss."""
+        df = data[sorted(columns)]
+        key = fingerprint(df) + ("-columnar" if columnar else "")
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        df = df.dropna()
+        r_df = rtransfer.convert(df, columnar=columnar)
+
+        size = df.memory_usage(deep=True).sum() / 1e9
+        if size <= self.max_gb:
+            self.entries[key] = r_df
+            self.sizes[key] = size
+            while self.gb > self.max_gb:
+                oldest, _ = self.entries.popitem(last=False)
+                del self.sizes[oldest]
+        return r_df
+
+    def clear(self) -> None:
+        """Drop all cached frames and reset the counters."""
+        self.entries.clear()
+        self.sizes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit/miss counters and cache size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "gb": self.gb,
+        }
+
+
+conversion_cache = ConversionCache()
@@ -1,50 +1,155 @@
 """Methods for calling did using rpy2."""
 
+from typing import Dict, Sequence
+
 from rpy2 import robjects
-from rpy2.robjects import packages
+import numpy as np
 import pandas as pd
+from nostocalean import rtransfer
 from nostocalean.functions import suppress
+from nostocalean.est import memo, numpy_did
+from nostocalean.est.memo import result_cache
+from nostocalean.est.rpackages import base, did as did_base
 
 RegressionResult = robjects.vectors.ListVector
 
-base = packages.importr("base")
-did_base = packages.importr("did")
+_aggte = robjects.r("""
+    function(x, types, ...) lapply(types, function(type) {
+        agg <- did::aggte(x, type = type, ...)
+        list(
+            agg,
+            as.numeric(agg$egt),
+            as.numeric(agg$att.egt),
+            as.numeric(agg$se.egt),
+            c(as.numeric(agg$crit.val.egt), NA_real_)[1],
+            c(agg$overall.att, agg$overall.se, qnorm(1 - agg$DIDparams$alp / 2))
+        )
+    })
+    """)
+
+
+def _key(kwargs: dict) -> str:
+    """Return a hashable key for aggte arguments."""
+    return repr(sorted((k, repr(v)) for k, v in kwargs.items()))
 
 
 class DidResult:
-    """Accessors for a did result."""
+    """Accessors for a did result.
+
+    Each aggregation type is computed once per set of aggte arguments and cached,
+    both as the R object and as a table of estimates, standard errors and bands.
+    """
 
     def __init__(self, result: RegressionResult):
         self.result = result
         self.rx = self.result.rx
+        self._aggregations = {}
+        self._summaries = {}
 
     def summary(self, **kwargs) -> str:
         """Return a string summary of a did result."""
         with suppress():
             return str(base.summary(self.result, **kwargs))  # pylint: disable=no-member
 
+    def _aggregate(self, types: Sequence[str], kwargs: dict) -> str:
+        """Compute the missing aggregations in a single R call and return the cache key."""
+        key = _key(kwargs)
+        missing = [t for t in types if (t, key) not in self._aggregations]
+        unknown = set(missing) - set(numpy_did.AGGREGATIONS)
+        if unknown:
+            raise ValueError(f"Unknown aggregation types {sorted(unknown)}.")
+        if missing:
+            with suppress():
+                computed = _aggte(self.result, robjects.StrVector(missing), **kwargs)
+            for type_, (agg, labels, estimates, se, crit, overall) in zip(
+                missing, computed
+            ):
+                name = numpy_did.AGGREGATIONS[type_]
+                table = numpy_did.aggregation_table(
+                    name,
+                    np.asarray(labels),
+                    np.asarray(estimates),
+                    np.asarray(se),
+                    float(crit[0]),
+                    tuple(np.asarray(overall)),
+                )
+                self._aggregations[(type_, key)] = (agg, table)
+        return key
+
+    def aggregate(
+        self, types: Sequence[str] = tuple(numpy_did.AGGREGATIONS), **kwargs
+    ) -> Dict[str, pd.DataFrame]:
+        """Return tables of several aggregations, computing the uncached ones in one batch."""
+        key = self._aggregate(types, kwargs)
+        return {t: self._aggregations[(t, key)][1].copy() for t in types}
+
+    def computed(self) -> Dict[str, pd.DataFrame]:
+        """Return the tables of the aggregations computed so far with default arguments."""
+        key = _key({})
+        return {
+            type_: table.copy()
+            for (type_, computed_key), (_, table) in self._aggregations.items()
+            if computed_key == key
+        }
+
+    def get_table(self, type_: str = "dynamic", **kwargs) -> pd.DataFrame:
+        """Return a simple, group, calendar or dynamic aggregation as a table."""
+        return self.aggregate([type_], **kwargs)[type_]
+
+    def aggte(self, type_: str = "dynamic", **kwargs) -> RegressionResult:
+        """Return the (cached) did::aggte result of an aggregation type."""
+        key = self._aggregate([type_], kwargs)
+        return self._aggregations[(type_, key)][0]
+
     def get_es(self) -> RegressionResult:
         """Return an aggregated event study of a did result."""
-        return did_base.aggte(self.result, type="dynamic")  # pylint: disable=no-member
+        return self.aggte("dynamic")
 
     def es_summary(self, **kwargs) -> str:
         """Return a string summary of an aggregated event study of a did result."""
-        with suppress():
-            # fmt: off
-            return str(base.summary(self.get_es(), **kwargs))  # pylint: disable=no-member
-            # fmt: on
-
-
-def att_gt(y: str, d: str, g: str, t: str, data: pd.DataFrame, **kwargs) -> DidResult:
-    """Wrapper for calling did::att_gt in R."""
+        key = _key(kwargs)
+        if key not in self._summaries:
+            with suppress():
+                # fmt: off
+                self._summaries[key] = str(base.summary(self.get_es(), **kwargs))  # pylint: disable=no-member
+                # fmt: on
+        return self._summaries[key]
+
+
+def att_gt(
+    y: str,
+    d: str,
+    g: str,
+    t: str,
+    data: pd.DataFrame,
+    columnar: bool = False,
+    engine: str = "did",
+    **kwargs,
+) -> DidResult:
+    """Wrapper for calling did::att_gt in R, transferring data with rtransfer if columnar.
+
+    With engine="numpy" the effects are estimated by nostocalean.est.numpy_did instead.
+    Results are memoized on disk when est.memo.result_cache is enabled.
+    """
+    if engine == "numpy":
+        return numpy_did.att_gt(y, d, g, t, data, **kwargs)
+    if engine != "did":
+        raise ValueError(f"Unknown engine {engine!r}.")
+
+    options = dict(kwargs)
     if "covariates" in kwargs:
-        kwargs["covariates"] = robjects.Formula("~" + "+".join(kwargs["covariates"]))
-
-    # fmt: off
-    result = did_base.att_gt(yname=y, gname=d, idname=g, tname=t, data=data) # pylint: disable=no-member
-    # fmt: on
-
-    return DidResult(result)
+        kwargs["xformla"] = robjects.Formula("~" + "+".join(kwargs.pop("covariates")))
+
+    def estimate() -> DidResult:
+        # fmt: off
+        result = did_base.att_gt(yname=y, gname=d, idname=g, tname=t, data=rtransfer.to_r(data) if columnar else data, **kwargs) # pylint: disable=no-member
+        # fmt: on
+        return DidResult(result)
+
+    columns = [y, d, g, t] + list(options.get("covariates", []))
+    return result_cache.memoize(
+        "att_gt", f"{y}~{d}|{g}|{t}", data, columns, options, estimate, memo.did_payload
+    )
 
 
 def did(*args, **kwargs) -> str:
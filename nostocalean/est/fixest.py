@@ -1,21 +1,59 @@
 """Methods for calling fixest using rpy2."""
 
 import re
-from typing import Optional
+from typing import Dict, List, Optional
 
 from rpy2 import robjects
-from rpy2.robjects import packages
+from rpy2.robjects import numpy2ri
+from rpy2.robjects.conversion import localconverter
+import numpy as np
 import pandas as pd
+from nostocalean import rtransfer
 from nostocalean.functions import suppress
+from nostocalean.est import memo, numpy_fixest
+from nostocalean.est.cache import conversion_cache
+from nostocalean.est.memo import result_cache
+from nostocalean.est.rpackages import base, fixest, stats
 
 RegressionResult = robjects.vectors.ListVector
 
-base = packages.importr("base")
-fixest = packages.importr("fixest")
+_element = robjects.r("function(x, name) x[[name]]")
+_coefnames = robjects.r("function(x) names(coef(x))")
+_fixef_sizes = robjects.r(
+    "function(x) list(as.character(names(x$fixef_sizes)), as.numeric(x$fixef_sizes))"
+)
+_fitstat = robjects.r(
+    "function(x) unlist(fixest::fitstat(x, ~ r2 + ar2 + wr2 + rmse, simplify = TRUE))"
+)
+
+
+def _r_data(data: pd.DataFrame, columns: list, cache: bool, columnar: bool):
+    """Return the estimation sample, through the conversion cache if requested."""
+    if isinstance(data, robjects.DataFrame):
+        return data
+    if cache:
+        return conversion_cache.get(data, columns, columnar=columnar)
+    if columnar:
+        return rtransfer.to_r(data[columns].dropna(subset=columns))
+    return data[columns].dropna(subset=columns)
+
+
+def _key(kwargs: dict) -> str:
+    """Return a hashable key for vcov/cluster arguments, which may be R objects."""
+    return repr(
+        sorted(
+            (k, v.r_repr() if hasattr(v, "r_repr") else repr(v))
+            for k, v in kwargs.items()
+        )
+    )
 
 
 class FixestResult:
-    """Accessors for a fixest result."""
+    """Accessors for a fixest result.
+
+    Structured accessors read the R object directly as NumPy arrays; summaries and
+    vcov matrices are computed once per vcov choice and cached.
+    """
 
     def __init__(self, result: robjects.vectors.ListVector, **kwargs):
         self.result = result
@@ -26,42 +64,124 @@ class FixestResult:
         else:
             self.mode = "cluster"
             self.cluster = kwargs["cluster"]
+        self._summaries = {}
+        self._vcovs = {}
+        self._cache = {}
 
-    def summary(self, **kwargs) -> str:
-        """Return a string summary of a feols result."""
+    def _vcov_kwargs(self, kwargs: dict) -> dict:
+        """Fill in the estimation-time vcov choice if none is given."""
         if "vcov" not in kwargs and "cluster" not in kwargs:
             if self.mode == "vcov":
                 kwargs["vcov"] = self.vcov
             else:
                 kwargs["cluster"] = self.cluster
+        return kwargs
+
+    def _get(self, name: str) -> Optional[np.ndarray]:
+        """Return an element of the R result as a NumPy array, or None if missing."""
+        with localconverter(robjects.default_converter + numpy2ri.converter):
+            value = _element(self.result, name)
+        return None if value is robjects.NULL else value
+
+    @property
+    def coefnames(self) -> List[str]:
+        """Get the coefficient names."""
+        if "coefnames" not in self._cache:
+            with localconverter(robjects.default_converter + numpy2ri.converter):
+                self._cache["coefnames"] = list(_coefnames(self.result))
+        return self._cache["coefnames"]
+
+    @property
+    def coef(self) -> np.ndarray:
+        """Get the coefficient estimates."""
+        return np.asarray(self._get("coefficients"), dtype=float)
+
+    @property
+    def nobs(self) -> int:
+        """Get the number of observations used in estimation."""
+        return int(np.asarray(self._get("nobs")).item())
+
+    @property
+    def fixef_sizes(self) -> Dict[str, int]:
+        """Get the number of levels of each fixed effect."""
+        with localconverter(robjects.default_converter + numpy2ri.converter):
+            names, sizes = _fixef_sizes(self.result)
+        return dict(zip(names, map(int, sizes)))
 
-        with suppress():
-            return str(base.summary(self.result, **kwargs))  # pylint: disable=no-member
+    def fitstat(self) -> Dict[str, float]:
+        """Return the R2, adjusted R2, within R2 and RMSE of the regression."""
+        if "fitstat" not in self._cache:
+            with localconverter(robjects.default_converter + numpy2ri.converter):
+                values = _fitstat(self.result)
+            self._cache["fitstat"] = dict(
+                zip(["r2", "ar2", "wr2", "rmse"], map(float, values))
+            )
+        return self._cache["fitstat"]
+
+    def vcov_matrix(self, **kwargs) -> np.ndarray:
+        """Return the coefficient vcov matrix for a vcov choice."""
+        kwargs = self._vcov_kwargs(kwargs)
+        key = _key(kwargs)
+        if key not in self._vcovs:
+            with localconverter(robjects.default_converter + numpy2ri.converter):
+                self._vcovs[key] = np.asarray(
+                    stats.vcov(self.result, **kwargs)  # pylint: disable=no-member
+                )
+        return self._vcovs[key]
+
+    def summary(self, **kwargs) -> str:
+        """Return a string summary of a feols result."""
+        kwargs = self._vcov_kwargs(kwargs)
+        key = _key(kwargs)
+        if key not in self._summaries:
+            with suppress():
+                # fmt: off
+                self._summaries[key] = str(base.summary(self.result, **kwargs))  # pylint: disable=no-member
+                # fmt: on
+        return self._summaries[key]
 
     def get_table(self, **kwargs) -> pd.DataFrame:
         """Return the coefficient table from a feols regression result."""
-        coeftable = pd.DataFrame(
-            self.rx["coeftable"][0], columns=["coef", "se", "t", "p"]
-        )
-        summary = self.summary()
-        coeftable.index = map(
-            lambda s: s.split(f" ")[0],
-            summary[summary.find("Standard-errors") : summary.find("\n---")].split(
-                "\n"
-            )[2:],
-        )  # Get coefficient names from fixest summary
-        return coeftable
+        key = _key(kwargs)
+        if key not in self._cache:
+            with localconverter(robjects.default_converter + numpy2ri.converter):
+                if kwargs:
+                    values = fixest.coeftable(
+                        self.result, **kwargs
+                    )  # pylint: disable=no-member
+                else:
+                    values = _element(self.result, "coeftable")
+            self._cache[key] = pd.DataFrame(
+                np.asarray(values),
+                columns=["coef", "se", "t", "p"],
+                index=self.coefnames,
+            )
+        return self._cache[key].copy()
 
 
 def feols(
     fml: str,
     data: pd.DataFrame,
+    engine: str = "fixest",
+    cache: bool = True,
+    columnar: bool = False,
     **kwargs,
 ) -> FixestResult:
-    """Wrapper for calling fixest::feols in R."""
+    """Wrapper for calling fixest::feols in R, or the numpy engine if engine="numpy".
+
+    With cache=True the converted R data.frame is reused across calls on the same data.
+    With columnar=True the data is transferred with nostocalean.rtransfer.
+    Results are memoized on disk when est.memo.result_cache is enabled.
+    """
+
+    if engine == "numpy":
+        return numpy_fixest.feols(fml, data, **kwargs)
+    if engine != "fixest":
+        raise ValueError(f"Unknown engine {engine!r}.")
 
     if "vcov" not in kwargs and "cluster" not in kwargs:
         kwargs["vcov"] = "hetero"
+    options = dict(kwargs)
 
     columns = set(re.findall(r"[\w']+", fml))
     columns = [column for column in columns if column != "1"]
@@ -74,24 +194,36 @@ def feols(
     if any(s in kwargs.get("vcov", "") for s in ["DK(", "NW(", "conley("]):
         kwargs["vcov"] = robjects.r(kwargs["vcov"])
 
-    result = fixest.feols(  # pylint: disable=no-member
-        robjects.Formula(fml),
-        data=data[columns].dropna(subset=columns),
-        **kwargs,
-    )
+    def estimate() -> FixestResult:
+        result = fixest.feols(  # pylint: disable=no-member
+            robjects.Formula(fml),
+            data=_r_data(data, columns, cache, columnar),
+            **kwargs,
+        )
+        return FixestResult(result, **kwargs)
 
-    return FixestResult(result, **kwargs)
+    return result_cache.memoize(
+        "feols", fml, data, columns, options, estimate, memo.fixest_payload
+    )
 
 
 def feglm(
     fml: str,
     data: pd.DataFrame,
+    cache: bool = True,
+    columnar: bool = False,
     **kwargs,
 ) -> FixestResult:
-    """Wrapper for calling fixest::feglm in R."""
+    """Wrapper for calling fixest::feglm in R.
+
+    With cache=True the converted R data.frame is reused across calls on the same data.
+    With columnar=True the data is transferred with nostocalean.rtransfer.
+    Results are memoized on disk when est.memo.result_cache is enabled.
+    """
 
     if "vcov" not in kwargs and "cluster" not in kwargs:
         kwargs["vcov"] = "hetero"
+    options = dict(kwargs)
 
     columns = set(re.findall(r"[\w']+", fml))
     columns = [column for column in columns if column != "1"]
@@ -102,13 +234,17 @@ def feglm(
             if kwargs[key][0] == "~":
                 kwargs[key] = robjects.Formula(kwargs[key])
 
-    result = fixest.feglm(  # pylint: disable=no-member
-        robjects.Formula(fml),
-        data=data[columns].dropna(subset=columns),
-        **kwargs,
-    )
+    def estimate() -> FixestResult:
+        result = fixest.feglm(  # pylint: disable=no-member
+            robjects.Formula(fml),
+            data=_r_data(data, columns, cache, columnar),
+            **kwargs,
+        )
+        return FixestResult(result, **kwargs)
 
-    return FixestResult(result, **kwargs)
+    return result_cache.memoize(
+        "feglm", fml, data, columns, options, estimate, memo.fixest_payload
+    )
 
 
 def reg(*args, **kwargs) -> str:
@@ -0,0 +1,162 @@
+"""Disk-backed memoization of estimation results."""
+
+import hashlib
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from nostocalean.diskcache import DiskStore
+from nostocalean.functions import fingerprint
+
+FIXEST_FIELDS = ["coefnames", "coef", "nobs", "fixef_sizes"]
+
+
+class CachedResult:
+    """Summaries, tables and statistics of a memoized estimation result.
+
+    Accessors answer from the stored payload when it holds what is asked for. Other
+    vcov/cluster arguments, aggregations that were not stored, and anything else of
+    the live result (such as result, rx or aggte) re-run the estimation once.
+    """
+
+    def __init__(self, payload: dict, estimate: Callable):
+        self.payload = payload
+        self._estimate = estimate
+        self._result = None
+
+    @property
+    def live(self):
+        """Get the live result, estimating it on first use."""
+        if self._result is None:
+            self._result = self._estimate()
+        return self._result
+
+    def _field(self, name: str, kwargs: dict):
+        """Return a stored field, or call the live result when it is missing or needs arguments."""
+        if not kwargs and name in self.payload:
+            return self.payload[name]
+        return getattr(self.live, name)(**kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name == "payload":
+            raise AttributeError(name)
+        if name in FIXEST_FIELDS and name in self.payload:
+            return self.payload[name]
+        return getattr(self.live, name)
+
+    def summary(self, **kwargs) -> str:
+        """Return the stored summary."""
+        return self._field("summary", kwargs)
+
+    def es_summary(self, **kwargs) -> str:
+        """Return the stored event study summary."""
+        return self._field("es_summary", kwargs)
+
+    def get_table(self, *args, **kwargs) -> pd.DataFrame:
+        """Return the stored coefficient table, or aggregation table of a did result."""
+        if "tables" not in self.payload:
+            if args or kwargs or "table" not in self.payload:
+                return self.live.get_table(*args, **kwargs)
+            return self.payload["table"].copy()
+        type_ = args[0] if args else kwargs.pop("type_", "dynamic")
+        if args[1:] or kwargs or type_ not in self.payload["tables"]:
+            return self.live.get_table(type_, *args[1:], **kwargs)
+        return self.payload["tables"][type_].copy()
+
+    def vcov_matrix(self, **kwargs):
+        """Return the stored vcov matrix."""
+        return self._field("vcov_matrix", kwargs)
+
+    def fitstat(self) -> dict:
+        """Return the stored fit statistics."""
+        return self._field("fitstat", {})
+
+
+def fixest_payload(result) -> dict:
+    """Extract the cacheable parts of a FixestResult."""
+    payload = {name: getattr(result, name) for name in FIXEST_FIELDS}
+    payload.update(
+        summary=result.summary(),
+        table=result.get_table(),
+        vcov_matrix=result.vcov_matrix(),
+        fitstat=result.fitstat(),
+    )
+    return payload
+
+
+def did_payload(result) -> dict:
+    """Extract the cacheable parts of a DidResult: its summaries and computed aggregations."""
+    payload = {"summary": result.summary(), "es_summary": result.es_summary()}
+    payload["tables"] = result.computed()
+    return payload
+
+
+class ResultCache:
+    """Opt-in disk cache of estimation results keyed by call and data fingerprint."""
+
+    def __init__(self, path: Optional[str] = None, max_gb: float = 5):
+        self.store = None if path is None else DiskStore(Path(path), max_gb, ".pkl")
+
+    @property
+    def enabled(self) -> bool:
+        """Check whether results are being memoized."""
+        return self.store is not None
+
+    def enable(self, path: str, max_gb: float = 5) -> None:
+        """Start memoizing results in a directory, evicting beyond max_gb."""
+        self.store = DiskStore(Path(path).expanduser(), max_gb, ".pkl")
+
+    def disable(self) -> None:
+        """Stop memoizing results."""
+        self.store = None
+
+    @staticmethod
+    def key(
+        function: str, fml: str, data: pd.DataFrame, columns: List[str], options: dict
+    ) -> str:
+        """Return the cache key of a call from its formula, options and referenced columns."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(function.encode())
+        digest.update(re.sub(r"\s+", "", fml).encode())
+        digest.update(repr(sorted((k, repr(v)) for k, v in options.items())).encode())
+        digest.update(fingerprint(data[sorted(set(columns))]).encode())
+        return digest.hexdigest()
+
+    def memoize(
+        self,
+        function: str,
+        fml: str,
+        data: pd.DataFrame,
+        columns: List[str],
+        options: dict,
+        estimate: Callable,
+        payload: Callable[..., dict],
+    ):
+        """Return a cached result for the call, or estimate it and cache its payload."""
+        if not self.enabled or not isinstance(data, pd.DataFrame):
+            return estimate()
+
+        key = self.key(function, fml, data, columns, options)
+        path = self.store.lookup(key)
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    return CachedResult(pickle.load(f), estimate)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                pass  # Evicted or unreadable, so estimate again
+
+        result = estimate()
+        content = payload(result)
+        self.store.write(key, lambda f: pickle.dump(content, f))
+        return result
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the cache size."""
+        return self.store.stats() if self.enabled else {}
+
+
+result_cache = ResultCache(os.environ.get("NOSTOCALEAN_RESULT_CACHE"))
@@ -0,0 +1,587 @@
+"""Methods for estimating Callaway and Sant'Anna group-time effects with NumPy."""
+
+import warnings
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+CONTROL_GROUPS = {"nevertreated": "Never Treated", "notyettreated": "Not Yet Treated"}
+EST_METHODS = {"dr": "Doubly Robust", "reg": "Outcome Regression"}
+AGGREGATIONS = {
+    "simple": None,
+    "group": "group",
+    "calendar": "time",
+    "dynamic": "event_time",
+}
+
+
+def multiplier_bootstrap(
+    inffunc,
+    cluster: Optional[np.ndarray] = None,
+    B: int = 1000,
+    alp: float = 0.05,
+    seed: Optional[int] = None,
+    max_gb: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """Return bootstrap standard errors and the uniform critical value of influence functions.
+
+    Follows did's mboot: Rademacher multipliers (per cluster if clustered), standard
+    errors from the bootstrap interquartile range, and the 1 - alp quantile of the
+    maximum studentized deviation for simultaneous bands. Draws are processed in
+    blocks whose size is bounded by max_gb.
+    """
+    n = inffunc.shape[0]
+    if cluster is not None:
+        codes, _ = pd.factorize(cluster)
+        n = int(codes.max()) + 1
+        membership = sparse.csr_matrix(
+            (np.ones(len(codes)), (codes, np.arange(len(codes)))),
+            shape=(n, len(codes)),
+        )
+        summed = membership @ inffunc
+        summed = summed.toarray() if sparse.issparse(summed) else np.asarray(summed)
+        inffunc = summed / np.bincount(codes, minlength=n)[:, None]
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, int(max_gb * 1e9 / (8 * n)))
+    bres = np.empty((B, inffunc.shape[1]))
+    for start in range(0, B, chunk):
+        V = rng.integers(0, 2, size=(n, min(chunk, B - start))) * 2.0 - 1.0
+        bres[start : start + V.shape[1]] = np.asarray(inffunc.T @ V).T / np.sqrt(n)
+
+    iqr = np.quantile(bres, 0.75, axis=0) - np.quantile(bres, 0.25, axis=0)
+    b_sigma = iqr / (stats.norm.ppf(0.75) - stats.norm.ppf(0.25))
+    b_sigma[b_sigma <= np.sqrt(np.finfo(float).eps) * 10] = np.nan
+    b_t = np.nanmax(np.abs(bres / b_sigma), axis=1)
+    crit = np.quantile(b_t[np.isfinite(b_t)], 1 - alp)
+    return {"se": b_sigma / np.sqrt(n), "crit": crit}
+
+
+def _table(estimates: np.ndarray, se: np.ndarray, crit: float) -> pd.DataFrame:
+    """Return estimates with standard errors and confidence bands."""
+    return pd.DataFrame(
+        {
+            "estimate": estimates,
+            "se": se,
+            "lower": estimates - crit * se,
+            "upper": estimates + crit * se,
+        }
+    )
+
+
+def aggregation_table(
+    name: Optional[str],
+    labels: np.ndarray,
+    estimates: np.ndarray,
+    se: np.ndarray,
+    crit: float,
+    overall: tuple,
+) -> pd.DataFrame:
+    """Return an aggregation's effects by label, with its overall effect in attrs["overall"].
+
+    overall is (estimate, standard error, pointwise critical value).
+    """
+    table = _table(
+        np.asarray(estimates, dtype=float), np.asarray(se, dtype=float), crit
+    )
+    if name is not None:
+        table.insert(0, name, labels)
+    estimate, se, z = overall
+    table.attrs["overall"] = _table(np.array([estimate]), np.array([se]), z)
+    return table
+
+
+def _format(
+    table: pd.DataFrame, columns: Dict[str, str], band: str, end: str = "Conf. Band]"
+) -> str:
+    """Format a table of estimates like the did package's summaries."""
+    out = table.rename(columns=columns)
+    out = out.rename(columns={"lower": f"[{band}", "upper": end})
+    out[""] = np.where((table["lower"] > 0) | (table["upper"] < 0), "*", "")
+    return out.to_string(index=False, float_format=lambda x: f"{x:.4f}")
+
+
+class NumpyDidResult:
+    """Accessors for group-time effects estimated with the numpy engine."""
+
+    def __init__(
+        self,
+        groups: np.ndarray,
+        times: np.ndarray,
+        att: np.ndarray,
+        inffunc: sparse.csc_matrix,
+        unit_groups: np.ndarray,
+        unit_cluster: Optional[np.ndarray],
+        control_group: str,
+        est_method: str,
+        alp: float,
+        B: int,
+        seed: Optional[int],
+        max_gb: float,
+    ):
+        self.groups = groups
+        self.times = times
+        self.att = att
+        self.inffunc = inffunc
+        self.unit_groups = unit_groups
+        self.unit_cluster = unit_cluster
+        self.control_group = control_group
+        self.est_method = est_method
+        self.alp = alp
+        self.bootstrap = dict(B=B, alp=alp, seed=seed, max_gb=max_gb)
+        self.n = inffunc.shape[0]
+        self._aggregations = {}
+        boot = multiplier_bootstrap(inffunc, unit_cluster, **self.bootstrap)
+        self.table = pd.concat(
+            [
+                pd.DataFrame({"group": groups, "time": times}),
+                _table(att, boot["se"], boot["crit"]),
+            ],
+            axis=1,
+        )
+
+    def pretest(self) -> float:
+        """Return the Wald pre-test p-value for parallel trends in pre-treatment periods."""
+        pre = np.flatnonzero(self.times < self.groups)
+        if len(pre) == 0:
+            return np.nan
+        inf_pre = self.inffunc[:, pre].toarray()
+        vcov = inf_pre.T @ inf_pre / self.n**2
+        att_pre = self.att[pre]
+        if np.linalg.matrix_rank(vcov) < len(pre):
+            warnings.warn("Singular pre-treatment covariance, skipping the pre-test.")
+            return np.nan
+        wald = att_pre @ np.linalg.solve(vcov, att_pre)
+        return stats.chi2.sf(wald, len(pre))
+
+    def summary(self) -> str:
+        """Return a string summary of a did result."""
+        band = f"{int(100 * (1 - self.alp))}% Simult. "
+        table = _format(
+            self.table,
+            {
+                "group": "Group",
+                "time": "Time",
+                "estimate": "ATT(g,t)",
+                "se": "Std. Error",
+            },
+            band,
+        )
+        return "\n".join(
+            [
+                "Group-Time Average Treatment Effects:",
+                table,
+                "---",
+                "Signif. codes: `*' confidence band does not cover 0",
+                "",
+                "P-value for pre-test of parallel trends assumption:  "
+                f"{self.pretest():.5f}",
+                f"Control Group:  {CONTROL_GROUPS[self.control_group]},  "
+                "Anticipation Periods:  0",
+                f"Estimation Method:  {self.est_method}",
+            ]
+        )
+
+    def _weights(self, cohorts: np.ndarray) -> tuple:
+        """Return cohort-share weights of estimates and their influence function correction."""
+        shares = np.array([np.mean(self.unit_groups == g) for g in cohorts])
+        total = shares.sum()
+        indicators = self.unit_groups[:, None] == cohorts[None, :]
+        wif = (indicators - shares) / total - np.outer(
+            (indicators - shares).sum(axis=1), shares
+        ) / total**2
+        return shares / total, wif
+
+    def _combine(self, att: np.ndarray, inffunc, cohorts: np.ndarray) -> tuple:
+        """Return the cohort-share weighted average of estimates and its influence function."""
+        weights, wif = self._weights(cohorts)
+        return att @ weights, np.asarray(inffunc @ weights).ravel() + wif @ att
+
+    def _aggregate(self, type_: str) -> pd.DataFrame:
+        """Compute an aggregation of the group-time effects, as in did::aggte."""
+        post = self.times >= self.groups
+        if type_ == "simple":
+            estimate, inf = self._combine(
+                self.att[post], self.inffunc[:, post], self.groups[post]
+            )
+            return self._aggregation(None, [], [], [], estimate, inf)
+
+        if type_ == "dynamic":
+            event_times = self.times - self.groups
+            labels = np.unique(event_times)
+            parts = [
+                self._combine(self.att[keep], self.inffunc[:, keep], self.groups[keep])
+                for keep in (event_times == e for e in labels)
+            ]
+        elif type_ == "group":
+            labels = np.unique(self.groups[post])
+            parts = []
+            for g in labels:
+                keep = np.flatnonzero(post & (self.groups == g))
+                equal = np.full(len(keep), 1 / len(keep))
+                parts.append((self.att[keep] @ equal, self.inffunc[:, keep] @ equal))
+        elif type_ == "calendar":
+            labels = np.unique(self.times[post])
+            parts = [
+                self._combine(self.att[keep], self.inffunc[:, keep], self.groups[keep])
+                for keep in (post & (self.times == t) for t in labels)
+            ]
+        else:
+            raise ValueError(f"Unknown aggregation type {type_!r}.")
+
+        estimates = np.array([estimate for estimate, _ in parts])
+        inffunc = np.column_stack([inf for _, inf in parts])
+        if type_ == "group":
+            estimate, inf = self._combine(estimates, inffunc, labels)
+        else:
+            overall = labels >= 0 if type_ == "dynamic" else np.ones(len(labels), bool)
+            estimate = estimates[overall].mean()
+            inf = inffunc[:, overall].mean(axis=1)
+        return self._aggregation(
+            AGGREGATIONS[type_], labels, estimates, inffunc, estimate, inf
+        )
+
+    def _aggregation(
+        self,
+        name: Optional[str],
+        labels: np.ndarray,
+        estimates: np.ndarray,
+        inffunc: np.ndarray,
+        estimate: float,
+        inf: np.ndarray,
+    ) -> pd.DataFrame:
+        """Bootstrap an aggregation and return its table."""
+        boot = multiplier_bootstrap(inf[:, None], self.unit_cluster, **self.bootstrap)
+        overall = (estimate, boot["se"][0], stats.norm.ppf(1 - self.alp / 2))
+        if len(labels) == 0:
+            return aggregation_table(name, labels, [], [], np.nan, overall)
+        boot = multiplier_bootstrap(inffunc, self.unit_cluster, **self.bootstrap)
+        return aggregation_table(
+            name, labels, estimates, boot["se"], boot["crit"], overall
+        )
+
+    def aggregate(
+        self, types: Sequence[str] = tuple(AGGREGATIONS)
+    ) -> Dict[str, pd.DataFrame]:
+        """Return several aggregations, computing each type once per result."""
+        for type_ in types:
+            if type_ not in self._aggregations:
+                self._aggregations[type_] = self._aggregate(type_)
+        return {type_: self._aggregations[type_].copy() for type_ in types}
+
+    def computed(self) -> Dict[str, pd.DataFrame]:
+        """Return the tables of the aggregations computed so far."""
+        return {type_: table.copy() for type_, table in self._aggregations.items()}
+
+    def get_table(self, type_: str = "dynamic") -> pd.DataFrame:
+        """Return a simple, group, calendar or dynamic aggregation as a table."""
+        return self.aggregate([type_])[type_]
+
+    def get_es(self) -> pd.DataFrame:
+        """Return the dynamic (event study) aggregation with simultaneous bands."""
+        return self.get_table("dynamic")
+
+    def es_summary(self) -> str:
+        """Return a string summary of an aggregated event study of a did result."""
+        es = self.get_es()
+        level = int(100 * (1 - self.alp))
+        overall = _format(
+            es.attrs["overall"],
+            {"estimate": "ATT", "se": "Std. Error"},
+            f"{level}% ",
+            "Conf. Int.]",
+        )
+        dynamic = _format(
+            es,
+            {"event_time": "Event time", "estimate": "Estimate", "se": "Std. Error"},
+            f"{level}% Simult. ",
+        )
+        return "\n".join(
+            [
+                "Overall summary of ATT's based on event-study/dynamic aggregation:",
+                overall,
+                "",
+                "Dynamic Effects:",
+                dynamic,
+                "---",
+                "Signif. codes: `*' confidence band does not cover 0",
+                "",
+                f"Control Group:  {CONTROL_GROUPS[self.control_group]},  "
+                "Anticipation Periods:  0",
+                f"Estimation Method:  {self.est_method}",
+            ]
+        )
+
+
+def _cell(
+    delta: np.ndarray,
+    treated: np.ndarray,
+    control: np.ndarray,
+    X: Optional[np.ndarray],
+    n: int,
+) -> tuple:
+    """Return the ATT and influence function entries of one (g, t) cell.
+
+    Without covariates this is a difference in mean changes; with covariates the
+    control changes are adjusted by an outcome regression, as in DRDID::reg_did_panel.
+    """
+    if X is None:
+        mu_t, mu_c = delta[treated].mean(), delta[control].mean()
+        inf_t = n * (delta[treated] - mu_t) / len(treated)
+        inf_c = -n * (delta[control] - mu_c) / len(control)
+        return mu_t - mu_c, inf_t, inf_c
+
+    X_c = X[control]
+    beta, *_ = np.linalg.lstsq(X_c, delta[control], rcond=None)
+    resid_t = delta[treated] - X[treated] @ beta
+    att = resid_t.mean()
+    inf_t = n * (resid_t - att) / len(treated)
+    gram_inv = np.linalg.pinv(X_c.T @ X_c)
+    inf_c = (
+        -n
+        * (X_c @ (gram_inv @ X[treated].mean(axis=0)))
+        * (delta[control] - X_c @ beta)
+    )
+    return att, inf_t, inf_c
+
+
+def _logit(X: np.ndarray, D: np.ndarray, iterations: int = 25) -> tuple:
+    """Return the fitted probabilities and inverse information of a logit by Newton's method."""
+    beta = np.zeros(X.shape[1])
+    for _ in range(iterations):
+        ps = 1 / (1 + np.exp(-X @ beta))
+        information = (X * (ps * (1 - ps))[:, None]).T @ X
+        step = np.linalg.solve(information, X.T @ (D - ps))
+        beta += step
+        if np.abs(step).max() < 1e-10:
+            break
+    ps = 1 / (1 + np.exp(-X @ beta))
+    return ps, np.linalg.inv((X * (ps * (1 - ps))[:, None]).T @ X)
+
+
+def _dr_cell(
+    delta: np.ndarray,
+    treated: np.ndarray,
+    control: np.ndarray,
+    X: np.ndarray,
+    n: int,
+) -> tuple:
+    """Return the doubly robust ATT and influence function entries of one (g, t) cell.
+
+    Follows DRDID::drdid_panel: a logit propensity score (controls with scores of
+    0.995 or more are trimmed) and an outcome regression on the control changes.
+    """
+    units = np.concatenate([treated, control])
+    D = (np.arange(len(units)) < len(treated)).astype(float)
+    X, delta, n1 = X[units], delta[units], len(units)
+
+    ps, vcov_ps = _logit(X, D)
+    ps = np.minimum(ps, 1 - 1e-6)
+    trim = np.where(D == 1, 1.0, ps < 0.995)
+    beta, *_ = np.linalg.lstsq(X[D == 0], delta[D == 0], rcond=None)
+    resid = delta - X @ beta
+
+    w_treat = trim * D
+    w_cont = trim * ps * (1 - D) / (1 - ps)
+    eta_treat = np.mean(w_treat * resid) / np.mean(w_treat)
+    eta_cont = np.mean(w_cont * resid) / np.mean(w_cont)
+
+    gram = (X * (1 - D)[:, None]).T @ X / n1
+    lin_ols = ((1 - D) * resid)[:, None] * X @ np.linalg.inv(gram)
+    lin_ps = ((D - ps)[:, None] * X) @ (n1 * vcov_ps)
+    inf_treat = (
+        w_treat * (resid - eta_treat) - lin_ols @ np.mean(w_treat[:, None] * X, axis=0)
+    ) / np.mean(w_treat)
+    inf_cont = (
+        w_cont * (resid - eta_cont)
+        + lin_ps @ np.mean((w_cont * (resid - eta_cont))[:, None] * X, axis=0)
+        - lin_ols @ np.mean(w_cont[:, None] * X, axis=0)
+    ) / np.mean(w_cont)
+    inf = n / n1 * (inf_treat - inf_cont)
+    return eta_treat - eta_cont, inf[: len(treated)], inf[len(treated) :]
+
+
+def _did_options(g: str, kwargs: dict) -> dict:
+    """Translate did::att_gt argument names to their numpy engine equivalents."""
+    options = {}
+    for name, value in kwargs.items():
+        if name == "xformla":
+            terms = [term.strip() for term in str(value).lstrip("~").split("+")]
+            options["covariates"] = [term for term in terms if term not in ("", "1")]
+        elif name == "clustervars":
+            clusters = [c for c in np.atleast_1d(value) if c != g]
+            if len(clusters) > 1:
+                raise ValueError("The numpy engine clusters on at most one variable.")
+            options["cluster"] = clusters[0] if clusters else None
+        elif name == "biters":
+            options["B"] = value
+        elif name in ("bstrap", "cband"):
+            if not value:
+                raise ValueError(
+                    f"{name}=False is not supported by the numpy engine, which "
+                    "always reports multiplier bootstrap standard errors and "
+                    "uniform confidence bands."
+                )
+        else:
+            raise TypeError(
+                f"att_gt() got an argument {name!r} that the numpy engine does not "
+                "support."
+            )
+    return options
+
+
+def att_gt(
+    y: str,
+    d: str,
+    g: str,
+    t: str,
+    data: pd.DataFrame,
+    covariates: Optional[List[str]] = None,
+    control_group: str = "nevertreated",
+    cluster: Optional[str] = None,
+    est_method: str = "dr",
+    alp: float = 0.05,
+    B: int = 1000,
+    seed: Optional[int] = None,
+    max_gb: float = 1.0,
+    engine: str = "numpy",
+    **kwargs,
+) -> NumpyDidResult:
+    """Estimate group-time average treatment effects on a balanced panel in NumPy.
+
+    d holds the first treated period (0 for never treated), g the unit id and t the
+    period. Pre-treatment cells use the previous period as base ("varying" base period).
+    With covariates, est_method is "dr" (doubly robust, did's default) or "reg"
+    (outcome regression). The did arguments xformla, clustervars, biters, bstrap and
+    cband are also accepted.
+    """
+    if engine != "numpy":
+        raise ValueError("Only the numpy engine is available without R.")
+    if control_group not in CONTROL_GROUPS:
+        raise ValueError(f"Unknown control group {control_group!r}.")
+    if est_method not in EST_METHODS:
+        raise ValueError(
+            f"est_method={est_method!r} is not implemented by the numpy engine; "
+            f"use one of {sorted(EST_METHODS)}."
+        )
+    options = _did_options(g, kwargs)
+    covariates = options.get("covariates", covariates)
+    cluster = options.get("cluster", cluster)
+    B = options.get("B", B)
+
+    covariates = list(covariates or [])
+    columns = list(
+        dict.fromkeys([y, d, g, t] + covariates + ([cluster] if cluster else []))
+    )
+    df = data[columns].dropna()
+
+    unit_codes, _ = pd.factorize(df[g])
+    times, time_codes = np.unique(df[t].to_numpy(), return_inverse=True)
+    n_units, n_times = int(unit_codes.max()) + 1, len(times)
+
+    Y = np.full((n_units, n_times), np.nan)
+    Y[unit_codes, time_codes] = df[y].to_numpy(float)
+    G = np.zeros(n_units)
+    G[unit_codes] = df[d].to_numpy(float)
+    G[G > times[-1]] = 0  # Treated after the sample ends, so never treated in-sample
+    keep = ~np.isnan(Y).any(axis=1) & ~((G > 0) & (G <= times[0]))
+    if not keep.all():
+        warnings.warn(
+            f"Dropped {int((~keep).sum())} units that are unbalanced or treated "
+            "in the first period."
+        )
+
+    X3 = None
+    if covariates:
+        X3 = np.zeros((n_units, n_times, len(covariates) + 1))
+        X3[..., 0] = 1
+        X3[unit_codes, time_codes, 1:] = df[covariates].to_numpy(float)
+        X3 = X3[keep]
+    unit_cluster = None
+    if cluster:
+        unit_cluster = np.empty(n_units, dtype=object)
+        unit_cluster[unit_codes] = df[cluster].to_numpy()
+        unit_cluster = unit_cluster[keep]
+
+    # Sort units by cohort so that every cohort is a contiguous block
+    order = np.argsort(G[keep], kind="stable")
+    Y, G = Y[keep][order], G[keep][order]
+    X3 = None if X3 is None else X3[order]
+    unit_cluster = None if unit_cluster is None else unit_cluster[order]
+    n = len(G)
+    cohorts = np.unique(G[G > 0])
+    bounds = np.searchsorted(G, np.concatenate([cohorts, [np.inf]]), side="left")
+    never = np.arange(0, bounds[0])
+    if control_group == "nevertreated" and len(never) == 0:
+        raise ValueError("No never-treated units; use control_group='notyettreated'.")
+
+    groups, cell_times, atts, rows, cols, values = [], [], [], [], [], []
+    for i, cohort in enumerate(cohorts):
+        treated = np.arange(bounds[i], bounds[i + 1])
+        pre_index = np.flatnonzero(times < cohort)[-1]
+        for ti in range(1, n_times):
+            base = pre_index if times[ti] >= cohort else ti - 1
+            if control_group == "nevertreated":
+                control = never
+            else:
+                later = np.searchsorted(G, max(times[ti], times[base]), side="right")
+                control = np.concatenate([never, np.arange(later, n)])
+                control = control[G[control] != cohort]
+            if len(control) == 0:
+                continue
+
+            delta = Y[:, ti] - Y[:, base]
+            X = None if X3 is None else X3[:, base]
+            if X is not None and est_method == "dr":
+                att, inf_t, inf_c = _dr_cell(delta, treated, control, X, n)
+            else:
+                att, inf_t, inf_c = _cell(delta, treated, control, X, n)
+
+            k = len(atts)
+            groups.append(cohort)
+            cell_times.append(times[ti])
+            atts.append(att)
+            rows += [treated, control]
+            cols += [np.full(len(treated), k), np.full(len(control), k)]
+            values += [inf_t, inf_c]
+
+    inffunc = sparse.csc_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n, len(atts)),
+    )
+    return NumpyDidResult(
+        np.array(groups, dtype=times.dtype),
+        np.array(cell_times, dtype=times.dtype),
+        np.array(atts),
+        inffunc,
+        G.astype(times.dtype),
+        unit_cluster,
+        control_group,
+        EST_METHODS[est_method] if covariates else "Difference in Means",
+        alp,
+        B,
+        seed,
+        max_gb,
+    )
+
+
+def did(*args, **kwargs) -> str:
+    """Estimate group-time treatment effects and return the summary."""
+    return att_gt(*args, **kwargs).summary()
+
+
+def pdid(*args, **kwargs) -> str:
+    """Estimate group-time treatment effects and print the summary."""
+    print(att_gt(*args, **kwargs).summary())
+
+
+def es(*args, **kwargs) -> str:
+    """Estimate dynamic effects and return the summary."""
+    return att_gt(*args, **kwargs).es_summary()
+
+
+def pes(*args, **kwargs) -> str:
+    """Estimate dynamic effects and print the summary."""
+    print(att_gt(*args, **kwargs).es_summary())
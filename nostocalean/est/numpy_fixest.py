@@ -0,0 +1,465 @@
+"""Methods for estimating fixest-style regressions with NumPy."""
+
+import re
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, stats
+
+from nostocalean.est import bootstrap
+
+VCOV_LABELS = {"iid": "IID", "hetero": "Heteroskedasticity-robust"}
+
+
+def parse_formula(fml: str) -> Tuple[str, List[str], List[str], bool]:
+    """Split a fixest formula into the outcome, regressors, fixed effects and intercept flag."""
+    parts = fml.split("|")
+    if len(parts) > 2:
+        raise ValueError("The numpy engine does not support instrumental variables.")
+    lhs, tilde, rhs = parts[0].partition("~")
+    if not tilde:
+        raise ValueError(f"Formula {fml!r} has no outcome.")
+
+    outcome = lhs.strip()
+    if not re.fullmatch(r"\w+", outcome):
+        raise ValueError(f"Unsupported outcome {outcome!r} in numpy engine.")
+
+    terms, intercept = [], True
+    for term in re.sub(r"-\s*1\b", "+0", rhs).split("+"):
+        term = term.strip()
+        if term in ("", "1"):
+            continue
+        if term == "0":
+            intercept = False
+        elif re.fullmatch(r"\w+(:\w+)*", term):
+            terms.append(term)
+        else:
+            raise ValueError(f"Unsupported term {term!r} in numpy engine.")
+
+    fixef = []
+    if len(parts) == 2:
+        for term in parts[1].split("+"):
+            term = term.strip()
+            if not re.fullmatch(r"\w+(\^\w+)*", term):
+                raise ValueError(f"Unsupported fixed effect {term!r} in numpy engine.")
+            fixef.append(term)
+
+    return outcome, terms, fixef, intercept and not fixef
+
+
+def group_codes(data: pd.DataFrame, term: str) -> np.ndarray:
+    """Return integer codes for a (possibly interacted with ^) grouping term."""
+    columns = [column.strip() for column in re.split(r"[\^:]", term)]
+    if len(columns) == 1:
+        return pd.factorize(data[columns[0]])[0]
+    return data.groupby(columns, sort=False).ngroup().to_numpy()
+
+
+def _sweep(
+    x: np.ndarray,
+    codes: Sequence[np.ndarray],
+    weights: np.ndarray,
+    sizes: Sequence[np.ndarray],
+) -> np.ndarray:
+    """Apply one pass of group demeaning over every fixed effect."""
+    x = x.copy()
+    for code, size in zip(codes, sizes):
+        x -= (np.bincount(code, weights=weights * x, minlength=len(size)) / size)[code]
+    return x
+
+
+def demean(
+    values: np.ndarray,
+    codes: Sequence[np.ndarray],
+    weights: Optional[np.ndarray] = None,
+    tol: float = 1e-8,
+    maxiter: int = 10_000,
+) -> np.ndarray:
+    """Partial fixed effects out of each column by alternating projections.
+
+    Each column is iterated separately and the projection sequence is accelerated
+    with the Irons-Tuck extrapolation used by fixest.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        return demean(values[:, None], codes, weights, tol, maxiter)[:, 0]
+    if not codes:
+        return values.copy()
+
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, float)
+    sizes = [np.bincount(code, weights=weights) for code in codes]
+    out = np.empty_like(values)
+
+    for j in range(values.shape[1]):
+        x = _sweep(values[:, j], codes, weights, sizes)
+        if len(codes) > 1:
+            for _ in range(maxiter):
+                gx = _sweep(x, codes, weights, sizes)
+                ggx = _sweep(gx, codes, weights, sizes)
+                delta_gx = ggx - gx
+                delta2 = delta_gx - (gx - x)
+                denom = delta2 @ delta2
+                x_new = (
+                    ggx - (delta_gx @ delta2) / denom * delta_gx if denom > 0 else ggx
+                )
+                converged = np.max(np.abs(x_new - x)) <= tol * (
+                    1 + np.max(np.abs(x_new))
+                )
+                x = x_new
+                if converged:
+                    break
+            else:
+                warnings.warn(f"Demeaning did not converge in {maxiter} iterations.")
+        out[:, j] = x
+
+    return out
+
+
+def _cluster_terms(cluster: Union[str, Sequence[str]]) -> List[str]:
+    """Return the cluster terms of a cluster formula or list of columns."""
+    if isinstance(cluster, str):
+        return [term.strip() for term in cluster.lstrip("~").split("+") if term.strip()]
+    return list(cluster)
+
+
+def _nested(inner: np.ndarray, outer: np.ndarray) -> bool:
+    """Check whether every group of inner codes lies within one group of outer codes."""
+    pairs = inner.astype(np.int64) * (int(outer.max()) + 1) + outer
+    return len(np.unique(pairs)) == int(inner.max()) + 1
+
+
+class NumpyFixestResult:
+    """Accessors for a fixed effects regression estimated with the numpy engine."""
+
+    def __init__(
+        self,
+        fml: str,
+        coefnames: List[str],
+        coef: np.ndarray,
+        X: np.ndarray,
+        residuals: np.ndarray,
+        weights: np.ndarray,
+        data: pd.DataFrame,
+        fixef: List[str],
+        fixef_codes: List[np.ndarray],
+        tss: float,
+        tss_within: float,
+        **kwargs,
+    ):
+        self.fml = fml
+        self.coefnames = coefnames
+        self.coef = coef
+        self.X = X
+        self.residuals = residuals
+        self.weights = weights
+        self.data = data
+        self.fixef = fixef
+        self.fixef_codes = fixef_codes
+        self.fixef_sizes = {
+            name: int(code.max()) + 1 for name, code in zip(fixef, fixef_codes)
+        }
+        self.nobs = len(residuals)
+        self.tss = tss
+        self.tss_within = tss_within
+        if "vcov" in kwargs:
+            self.mode = "vcov"
+            self.vcov = kwargs["vcov"]
+        else:
+            self.mode = "cluster"
+            self.cluster = kwargs["cluster"]
+
+    def _vcov_spec(self, **kwargs) -> Tuple[str, List[str]]:
+        """Resolve vcov/cluster arguments into a vcov type and cluster terms."""
+        if "vcov" not in kwargs and "cluster" not in kwargs:
+            if self.mode == "vcov":
+                kwargs["vcov"] = self.vcov
+            else:
+                kwargs["cluster"] = self.cluster
+
+        if kwargs.get("cluster") is not None:
+            return "cluster", _cluster_terms(kwargs["cluster"])
+        vcov = kwargs["vcov"]
+        if vcov in ("iid", "standard"):
+            return "iid", []
+        if vcov in ("hetero", "HC1", "white"):
+            return "hetero", []
+        if vcov == "cluster" and self.fixef:
+            return "cluster", self.fixef[:1]
+        if vcov == "twoway" and len(self.fixef) > 1:
+            return "cluster", self.fixef[:2]
+        if isinstance(vcov, str) and vcov.startswith("~"):
+            return "cluster", _cluster_terms(vcov)
+        raise ValueError(f"Unsupported vcov {vcov!r} in numpy engine.")
+
+    def _dof(self, clusters: Sequence[np.ndarray] = ()) -> int:
+        """Return the number of estimated parameters, excluding fixed effects nested in clusters."""
+        k = len(self.coef)
+        if self.fixef_codes:
+            k += 1
+            for code, size in zip(self.fixef_codes, self.fixef_sizes.values()):
+                if not any(_nested(code, cluster) for cluster in clusters):
+                    k += size - 1
+        return k
+
+    def _vcov(self, **kwargs) -> Tuple[np.ndarray, str, int]:
+        """Return the vcov matrix, its label, and the t-test degrees of freedom."""
+        kind, terms = self._vcov_spec(**kwargs)
+        X, resid, weights, n = self.X, self.residuals, self.weights, self.nobs
+        bread = np.linalg.inv(X.T @ (weights[:, None] * X))
+
+        if kind == "iid":
+            k = self._dof()
+            sigma2 = weights @ resid**2 / (n - k)
+            return sigma2 * bread, VCOV_LABELS[kind], n - k
+
+        scores = X * (weights * resid)[:, None]
+        if kind == "hetero":
+            k = self._dof()
+            meat = scores.T @ scores
+            return bread @ meat @ bread * n / (n - k), VCOV_LABELS[kind], n - k
+
+        clusters = [group_codes(self.data, term) for term in terms]
+        adj, n_clusters = self._cluster_adj(clusters)
+        meat = np.zeros_like(bread)
+        for mask in range(1, 2 ** len(clusters)):
+            members = [c for i, c in enumerate(clusters) if mask >> i & 1]
+            codes = members[0]
+            for other in members[1:]:
+                codes = pd.factorize(
+                    codes.astype(np.int64) * (int(other.max()) + 1) + other
+                )[0]
+            summed = np.stack(
+                [np.bincount(codes, weights=column) for column in scores.T], axis=1
+            )
+            meat += (-1) ** (len(members) + 1) * (summed.T @ summed)
+        label = f"Clustered ({' & '.join(terms)})"
+        return bread @ meat @ bread * adj, label, n_clusters - 1
+
+    def _cluster_adj(self, clusters: Sequence[np.ndarray]) -> Tuple[float, int]:
+        """Return the clustered small-sample adjustment and the smallest cluster count."""
+        n, k = self.nobs, self._dof(clusters)
+        n_clusters = min(int(cluster.max()) + 1 for cluster in clusters)
+        return n_clusters / (n_clusters - 1) * (n - 1) / (n - k), n_clusters
+
+    def vcov_matrix(self, **kwargs) -> np.ndarray:
+        """Return the coefficient vcov matrix for a vcov choice."""
+        return self._vcov(**kwargs)[0]
+
+    def fitstat(self) -> Dict[str, float]:
+        """Return the R2, adjusted R2, within R2 and RMSE of the regression."""
+        rss = self.weights @ self.residuals**2
+        return {
+            "r2": 1 - rss / self.tss,
+            "ar2": 1 - rss / self.tss * (self.nobs - 1) / (self.nobs - self._dof()),
+            "wr2": 1 - rss / self.tss_within if self.fixef else np.nan,
+            "rmse": np.sqrt(rss / self.weights.sum()),
+        }
+
+    def coeftable(self, **kwargs) -> pd.DataFrame:
+        """Return the coefficient table for a vcov choice."""
+        vcov, _, df = self._vcov(**kwargs)
+        se = np.sqrt(np.diag(vcov))
+        t = self.coef / se
+        return pd.DataFrame(
+            {"coef": self.coef, "se": se, "t": t, "p": 2 * stats.t.sf(np.abs(t), df)},
+            index=self.coefnames,
+        )
+
+    def boottest(
+        self,
+        param: str,
+        r: float = 0.0,
+        B: int = 9999,
+        weight_type: str = "rademacher",
+        impose_null: bool = True,
+        bootcluster: Optional[str] = None,
+        seed: Optional[int] = None,
+        max_gb: float = 1.0,
+        **kwargs,
+    ) -> Dict:
+        """Return a wild cluster bootstrap test of param = r.
+
+        Clusters follow the vcov/cluster arguments (or the estimation-time choice), and
+        draws are made at the bootcluster level (default: the first cluster term).
+        """
+        kind, terms = self._vcov_spec(**kwargs)
+        if kind != "cluster":
+            raise ValueError("The wild cluster bootstrap requires clustered errors.")
+        clusters = [group_codes(self.data, term) for term in terms]
+        result = bootstrap.wild_cluster_bootstrap(
+            self.X,
+            self.X @ self.coef + self.residuals,
+            clusters,
+            self.coefnames.index(param),
+            r=r,
+            B=B,
+            weight_type=weight_type,
+            impose_null=impose_null,
+            bootcluster=0 if bootcluster is None else terms.index(bootcluster),
+            weights=self.weights,
+            adj=self._cluster_adj(clusters)[0],
+            seed=seed,
+            max_gb=max_gb,
+        )
+        result["param"] = param
+        return result
+
+    def summary(self, **kwargs) -> str:
+        """Return a string summary of a feols result."""
+        _, label, _ = self._vcov(**kwargs)
+        table = self.coeftable(**kwargs)
+        table.columns = ["Estimate", "Std. Error", "t value", "Pr(>|t|)"]
+        fit = self.fitstat()
+        lines = [
+            f"OLS estimation, Dep. Var.: {self.fml.split('~')[0].strip()}",
+            f"Observations: {self.nobs:,}",
+        ]
+        if self.fixef:
+            sizes = ",  ".join(
+                f"{name}: {size:,}" for name, size in self.fixef_sizes.items()
+            )
+            lines.append(f"Fixed-effects: {sizes}")
+        lines += [f"Standard-errors: {label} ", table.to_string(), "---"]
+        stats_line = f"RMSE: {fit['rmse']:.6g}   Adj. R2: {fit['ar2']:.6g}"
+        if self.fixef:
+            stats_line += f"   Within R2: {fit['wr2']:.6g}"
+        lines.append(stats_line)
+        return "\n".join(lines)
+
+    def get_table(self, **kwargs) -> pd.DataFrame:
+        """Return the coefficient table from a feols regression result."""
+        return self.coeftable(**kwargs)
+
+
+def sample_columns(fml: str, kwargs: dict) -> List[str]:
+    """Return the columns referenced by a formula and its keyword arguments."""
+    columns = set(re.findall(r"[\w']+", fml))
+    columns = [column for column in columns if column not in ("0", "1")]
+    for key in ["cluster", "panel_id", "split", "weights"]:
+        if isinstance(kwargs.get(key), str):
+            columns = list(set(columns + re.findall(r"[\w']+", kwargs[key])))
+        elif kwargs.get(key) is not None:
+            columns = list(set(columns + list(kwargs[key])))
+    return columns
+
+
+def _variable(data: pd.DataFrame, term: str) -> np.ndarray:
+    """Return the values of a column or of an interaction (a:b) of columns."""
+    if term == "(Intercept)":
+        return np.ones(len(data))
+    return np.prod([data[v].to_numpy(float) for v in term.split(":")], axis=0)
+
+
+def feols_many(
+    fmls: List[str],
+    data: pd.DataFrame,
+    tol: float = 1e-8,
+    maxiter: int = 10_000,
+    **kwargs,
+) -> Dict[str, NumpyFixestResult]:
+    """Estimate specifications with the same fixed effects on a complete-case sample.
+
+    Every variable is demeaned once and shared by all specifications that use it.
+    """
+    if "vcov" not in kwargs and "cluster" not in kwargs:
+        kwargs["vcov"] = "hetero"
+
+    specs = {fml: parse_formula(fml) for fml in fmls}
+    fixef = next(iter(specs.values()))[2]
+    if any(spec[2] != fixef for spec in specs.values()):
+        raise ValueError("All specifications must share the same fixed effects.")
+
+    weights = np.ones(len(data))
+    if kwargs.get("weights") is not None:
+        weights = data[kwargs.pop("weights").lstrip("~").strip()].to_numpy(float)
+
+    variables = list(
+        dict.fromkeys(
+            name
+            for outcome, terms, _, intercept in specs.values()
+            for name in [outcome] + (["(Intercept)"] if intercept else []) + terms
+        )
+    )
+    raw = np.column_stack([_variable(data, name) for name in variables])
+    fixef_codes = [group_codes(data, term) for term in fixef]
+    demeaned = demean(raw, fixef_codes, weights, tol, maxiter)
+    position = {name: i for i, name in enumerate(variables)}
+
+    results = {}
+    for fml, (outcome, terms, _, intercept) in specs.items():
+        coefnames = (["(Intercept)"] if intercept else []) + terms
+        y = raw[:, position[outcome]]
+        y_dm = demeaned[:, position[outcome]]
+        X_dm = demeaned[:, [position[name] for name in coefnames]]
+
+        # Drop collinear regressors, as fixest does, using a pivoted QR of X'WX
+        if coefnames:
+            _, r, pivots = linalg.qr(X_dm.T @ (weights[:, None] * X_dm), pivoting=True)
+            keep = np.sort(pivots[np.abs(np.diag(r)) > 1e-10 * np.abs(r[0, 0])])
+            dropped = [name for i, name in enumerate(coefnames) if i not in keep]
+            if dropped:
+                warnings.warn(
+                    f"The variables {dropped} have been removed because of collinearity."
+                )
+            X_dm = X_dm[:, keep]
+            coefnames = [coefnames[i] for i in keep]
+
+        coef = np.linalg.solve(
+            X_dm.T @ (weights[:, None] * X_dm), X_dm.T @ (weights * y_dm)
+        )
+        residuals = y_dm - X_dm @ coef
+        y_bar = weights @ y / weights.sum()
+        results[fml] = NumpyFixestResult(
+            fml,
+            coefnames,
+            coef,
+            X_dm,
+            residuals,
+            weights,
+            data,
+            fixef,
+            fixef_codes,
+            tss=weights @ (y - y_bar) ** 2,
+            tss_within=weights @ y_dm**2,
+            **kwargs,
+        )
+
+    return results
+
+
+def feols(
+    fml: str,
+    data: pd.DataFrame,
+    tol: float = 1e-8,
+    maxiter: int = 10_000,
+    **kwargs,
+) -> NumpyFixestResult:
+    """Estimate a fixest-style OLS regression with fixed effects in NumPy."""
+    if kwargs.pop("engine", "numpy") != "numpy":
+        raise ValueError("Only the numpy engine is available without R.")
+    unsupported = set(kwargs) - {"vcov", "cluster", "weights"}
+    if unsupported:
+        raise ValueError(
+            f"Unsupported arguments for numpy engine: {sorted(unsupported)}"
+        )
+
+    columns = sample_columns(fml, kwargs)
+    data = data[columns].dropna(subset=columns)
+    return feols_many([fml], data, tol, maxiter, **kwargs)[fml]
+
+
+def reg(*args, **kwargs) -> str:
+    """Run a numpy feols regression and return the summary."""
+    return feols(*args, **kwargs).summary()
+
+
+def preg(*args, **kwargs) -> None:
+    """Run a numpy feols regression and print the summary."""
+    print(feols(*args, **kwargs).summary())
+
+
+def treg(*args, **kwargs) -> pd.DataFrame:
+    """Run a numpy feols regression and return the coefficient table."""
+    return feols(*args, **kwargs).get_table()
@@ -0,0 +1,22 @@
+"""R packages imported with rpy2 on first use."""
+
+from rpy2.robjects import packages
+
+
+class LazyPackage:
+    """An R package that is imported with importr when first used."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._package = None
+
+    def __getattr__(self, attr: str):
+        if self._package is None:
+            self._package = packages.importr(self.name)
+        return getattr(self._package, attr)
+
+
+base = LazyPackage("base")
+fixest = LazyPackage("fixest")
+stats = LazyPackage("stats")
+did = LazyPackage("did")
@@ -1,12 +1,19 @@
 """Custom pandas_flavor methods."""
 
-from typing import List, Optional, TypeVar, Union
+import os
+import tempfile
+import urllib.parse
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, TypeVar, Union
 
 import pandas as pd
 import pandas_flavor as pf
 import numpy as np
-import matplotlib as mpl
-import seaborn as sns
+
+if TYPE_CHECKING:  # Plotting libraries are imported when a plot is drawn
+    import matplotlib as mpl
 
 FrameOrSeries = TypeVar("FrameOrSeries", pd.DataFrame, pd.Series)
 
@@ -20,10 +27,124 @@ def mem(df: FrameOrSeries, deep: bool = True) -> float:
     return df.memory_usage(deep=deep) / 1e9
 
 
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+UINT_TYPES = [np.uint8, np.uint16, np.uint32, np.uint64]
+
+
+def _smallest_int(series: pd.Series, nullable: bool) -> Optional[str]:
+    """Return a smaller integer dtype of the same signedness that holds the values, if any.
+
+    Floats with only integral values map to nullable signed integers, if nullable.
+    """
+    values = series.dropna()
+    if len(values) == 0:
+        return None
+    floating = pd.api.types.is_float_dtype(series.dtype)
+    if floating and not (nullable and np.array_equal(values, np.round(values))):
+        return None
+    unsigned = pd.api.types.is_unsigned_integer_dtype(series.dtype)
+    extension = floating or pd.api.types.is_extension_array_dtype(series.dtype)
+    if extension and not nullable:
+        return None
+    low, high = values.min(), values.max()
+    for int_type in UINT_TYPES if unsigned else INT_TYPES:
+        info = np.iinfo(int_type)
+        if info.dtype.itemsize >= series.dtype.itemsize:
+            return None
+        if info.min <= low and high <= info.max:
+            name = info.dtype.name
+            return (
+                name.replace("uint", "UInt").replace("int", "Int")
+                if extension
+                else name
+            )
+    return None
+
+
+def _shrink_series(series: pd.Series, max_unique: float, nullable: bool) -> pd.Series:
+    """Return a series in the most compact dtype that preserves its values."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        int_dtype = _smallest_int(series, nullable)
+        return series if int_dtype is None else series.astype(int_dtype)
+    if dtype in (np.float32, np.float64):
+        candidates = [series]
+        downcast = series.astype(np.float32)
+        if np.array_equal(downcast, series, equal_nan=True):
+            candidates.append(downcast)
+        int_dtype = _smallest_int(series, nullable) if series.hasnans else None
+        if int_dtype is not None:
+            candidates.append(series.astype(int_dtype))
+        return min(candidates, key=lambda c: c.memory_usage(index=False, deep=True))
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        values = series.dropna()
+        if nullable and len(values) and values.map(type).eq(bool).all():
+            return series.astype("boolean")
+        try:
+            n_unique = series.nunique()
+        except TypeError:  # Unhashable values such as lists
+            return series
+        if n_unique <= max_unique * len(series):
+            return series.astype("category")
+    return series
+
+
+@pf.register_dataframe_method
+def shrink(
+    df: pd.DataFrame,
+    max_unique: float = 0.5,
+    nullable: bool = True,
+    dry_run: bool = False,
+) -> pd.DataFrame:
+    """Return a dataframe with each column in the most compact dtype that preserves its values.
+
+    Integers are downcast to the smallest integer of the same signedness (and
+    nullability, if nullable), float64 to float32 when exact, and strings with at
+    most max_unique unique values per row to categoricals. With nullable, integral
+    floats with missing values become nullable integers and boolean objects become
+    "boolean". Columns keep their dtype unless the new one uses less memory.
+    The plan (dtypes and GB before and after, excluding the index, with mem() totals)
+    is in attrs["shrink"], or is returned itself if dry_run.
+    """
+    out = df if dry_run else df.copy(deep=False)
+    rows = []
+    for i, column in enumerate(df.columns):
+        series = df.iloc[:, i]
+        shrunk = _shrink_series(series, max_unique, nullable)
+        gb_before = series.memory_usage(index=False, deep=True) / 1e9
+        gb_after = shrunk.memory_usage(index=False, deep=True) / 1e9
+        if gb_after >= gb_before:
+            shrunk, gb_after = series, gb_before
+        rows.append([column, str(series.dtype), str(shrunk.dtype), gb_before, gb_after])
+        if not dry_run:
+            out.isetitem(i, shrunk)
+
+    plan = pd.DataFrame(
+        rows, columns=["column", "before", "after", "gb_before", "gb_after"]
+    ).set_index("column")
+    index_gb = df.index.memory_usage(deep=True) / 1e9
+    after = plan["gb_after"].sum() + index_gb if dry_run else out.mem()
+    plan.loc["total"] = ["", "", df.mem(), after]
+    if dry_run:
+        return plan
+    out.attrs["shrink"] = plan
+    return out
+
+
 @pf.register_dataframe_method
 @pf.register_series_method
-def desc(df: FrameOrSeries, increment: float = 0.1) -> FrameOrSeries:
-    """Calls pandas describe with a specified percentile increment."""
+def desc(
+    df: FrameOrSeries, increment: float = 0.1, streaming: bool = False, **kwargs
+) -> FrameOrSeries:
+    """Calls pandas describe with a specified percentile increment, or one-pass sketches if streaming."""
+    if streaming:
+        # pylint: disable=import-outside-toplevel
+        from nostocalean.streaming import desc as streaming_desc
+
+        summary = streaming_desc(df, increment, **kwargs)
+        return summary.iloc[:, 0] if isinstance(df, pd.Series) else summary
     return df.describe(percentiles=np.arange(increment, 1, increment))
 
 
@@ -41,9 +162,94 @@ def rescale(series: pd.Series, upper: float = 0, lower: float = 1) -> pd.Series:
     )
 
 
+def _integer_cutoffs(cutoffs: np.ndarray, dtype: np.dtype, fill: int) -> np.ndarray:
+    """Round cutoffs to an integer dtype, so that clipping keeps a column's dtype."""
+    out = np.full(len(cutoffs), fill, dtype=dtype)
+    finite = np.isfinite(cutoffs)
+    out[finite] = np.round(cutoffs[finite])
+    return out
+
+
+def _winsorize_frame(
+    df: pd.DataFrame,
+    left: float,
+    right: float,
+    columns: Optional[List[str]],
+    by: Union[List[str], str, None],
+    inplace: bool,
+    sample: Optional[int],
+    seed: Optional[int],
+) -> Optional[pd.DataFrame]:
+    """Winsorize columns of a dataframe, within groups if by is given."""
+    if columns is None:
+        columns = df.select_dtypes("number").columns.difference(
+            [by] if isinstance(by, str) else by or [], sort=False
+        )
+    columns = list(columns)
+    if by is None:
+        codes, n_groups = np.zeros(len(df), dtype=np.int64), 1
+    else:
+        keys = df[[by] if isinstance(by, str) else by]
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+        codes[keys.isna().any(axis=1).to_numpy()] = -1  # Rows without a group
+        n_groups = len(uniques)
+
+    frame, frame_codes = df[columns], codes
+    if sample is not None and sample < len(df):
+        rows = np.random.default_rng(seed).choice(len(df), sample, replace=False)
+        frame, frame_codes = frame.iloc[rows], codes[rows]
+
+    # One quantile computation per column and group; missing groups are not clipped
+    quantiles = [left / 100, 1 - right / 100]
+    cutoffs = frame.groupby(frame_codes).quantile(quantiles)
+    lower, upper = (
+        np.vstack(
+            [
+                cutoffs.xs(q, level=1).reindex(range(n_groups)).to_numpy(float),
+                np.full((1, len(columns)), bound),
+            ]
+        )
+        for q, bound in zip(quantiles, [-np.inf, np.inf])
+    )
+    lower[np.isnan(lower)], upper[np.isnan(upper)] = -np.inf, np.inf
+
+    out = df if inplace else df.copy()
+    for j, column in enumerate(columns):
+        series = df[column]
+        low, high = lower[codes, j], upper[codes, j]  # Code -1 is unclipped
+        dtype = np.dtype(getattr(series.dtype, "numpy_dtype", series.dtype))
+        if dtype.kind in "iu":
+            low = _integer_cutoffs(low, dtype, np.iinfo(dtype).min)
+            high = _integer_cutoffs(high, dtype, np.iinfo(dtype).max)
+        else:
+            low, high = low.astype(dtype), high.astype(dtype)
+        out[column] = series.clip(lower=low, upper=high)
+    return None if inplace else out
+
+
+@pf.register_dataframe_method
 @pf.register_series_method
-def winsorize(series: pd.Series, left: float = 1, right: float = 1) -> pd.Series:
-    """Winsorizes a series at the provided percentiles."""
+def winsorize(
+    series: FrameOrSeries,
+    left: float = 1,
+    right: float = 1,
+    columns: Optional[List[str]] = None,
+    by: Union[List[str], str, None] = None,
+    inplace: bool = False,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Optional[FrameOrSeries]:
+    """Winsorizes a series, or columns of a dataframe, at the provided percentiles.
+
+    For dataframes, columns defaults to the numeric columns and cutoffs are computed
+    within by groups if given. With sample, cutoffs are estimated from that many
+    randomly drawn rows, which is much faster on very large frames; groups with no
+    sampled rows are left unclipped. Columns keep their dtypes, so cutoffs of
+    integer columns are rounded.
+    """
+    if isinstance(series, pd.DataFrame):
+        return _winsorize_frame(series, left, right, columns, by, inplace, sample, seed)
+
     values = series.dropna()
     left_cutoff = np.percentile(values, left)
     right_cutoff = np.percentile(values, 100 - right)
@@ -54,17 +260,92 @@ def winsorize(series: pd.Series, left: float = 1, right: float = 1) -> pd.Series
     return series
 
 
+class JoinIndex:
+    """Prebuilt lookup of right-hand rows by key, for repeated left_merge calls.
+
+    Keys are factorized into a unique pandas Index once, whose hash table maps keys
+    to row positions; a single sorted numeric key is looked up by binary search
+    instead. Duplicate keys are reported when the index is built and the first row
+    of each key is kept.
+    """
+
+    def __init__(
+        self,
+        other: Union[pd.DataFrame, pd.Series],
+        on: Union[List[str], str, None] = None,
+    ):
+        if isinstance(other, pd.Series):
+            other = other.to_frame()
+            keys = other.index
+        else:
+            on = [on] if isinstance(on, str) else on
+            keys = pd.MultiIndex.from_frame(other[on]) if len(on) > 1 else None
+            keys = pd.Index(other[on[0]]) if keys is None else keys
+            other = other.drop(columns=on)
+
+        duplicated = keys.duplicated()
+        if duplicated.any():
+            warnings.warn(
+                f"{duplicated.sum()} duplicate keys in the join index (e.g. "
+                f"{keys[duplicated][0]}); keeping the first row of each key."
+            )
+            keys, other = keys[~duplicated], other[~duplicated]
+
+        self.keys = keys
+        self.sorted = (
+            keys.nlevels == 1
+            and (
+                pd.api.types.is_numeric_dtype(keys)
+                or pd.api.types.is_datetime64_any_dtype(keys)
+            )
+            and keys.is_monotonic_increasing
+        )
+        self.columns = {column: other[column].array for column in other.columns}
+
+    def positions(self, keys: Union[pd.DataFrame, pd.Series]) -> np.ndarray:
+        """Return the row position of each key, or -1 if it is missing."""
+        if isinstance(keys, pd.DataFrame) and keys.shape[1] > 1:
+            return self.keys.get_indexer(pd.MultiIndex.from_frame(keys))
+        values = (keys.iloc[:, 0] if isinstance(keys, pd.DataFrame) else keys).array
+        sorted_keys = self.keys.to_numpy()
+        if not self.sorted or np.asarray(values).dtype != sorted_keys.dtype:
+            return self.keys.get_indexer(values)
+        values = np.asarray(values)
+        positions = np.searchsorted(sorted_keys, values)
+        found = positions < len(sorted_keys)
+        found[found] = sorted_keys[positions[found]] == values[found]
+        return np.where(found, positions, -1)
+
+    def take(self, column: str, positions: np.ndarray):
+        """Return a right-hand column at row positions, missing where positions is -1."""
+        return pd.api.extensions.take(self.columns[column], positions, allow_fill=True)
+
+
 @pf.register_dataframe_method
 def left_merge(
     df: pd.DataFrame,
-    other: Union[pd.DataFrame, pd.Series],
+    other: Union[pd.DataFrame, pd.Series, JoinIndex],
     on: Union[List[str], str],
     right_columns: Union[List[str], str, None] = None,
 ) -> pd.DataFrame:
-    """Convenience in-place method for left merge that avoids copying irrelevant columns."""
+    """Convenience in-place method for left merge that avoids copying irrelevant columns.
+
+    With a JoinIndex as other, columns are filled by positional take from the
+    prebuilt index, without materializing the merged frame.
+    """
     if isinstance(on, str):
         on = [on]
 
+    if isinstance(other, JoinIndex):
+        positions = other.positions(df[on])
+        if right_columns is None:
+            right_columns = list(other.columns)
+        elif isinstance(right_columns, str):
+            right_columns = [right_columns]
+        for column in right_columns:
+            df[column] = other.take(column, positions)
+        return
+
     if isinstance(other, pd.DataFrame):
         addition = df[on].merge(other, on=on, how="left")
     else:
@@ -79,6 +360,14 @@ def left_merge(
             df[column] = addition[column].values
 
 
+def trim_periods(
+    series: pd.DataFrame, x: str, group: str, i: int, e: int
+) -> pd.DataFrame:
+    """Drop the last i and then the first e periods of each group of a time series."""
+    T = series[x].nunique()
+    return series.groupby(group).head(T - i).groupby(group).tail(T - i - e)
+
+
 @pf.register_dataframe_method
 def tsg(
     df: pd.DataFrame,
@@ -91,9 +380,7 @@ def tsg(
 ) -> pd.Series:
     """Return a grouped time series given an outcome variable and aggregation function."""
     series = df.groupby([x, group])[y].agg(agg).reset_index()
-    T = series[x].nunique()
-    series = series.groupby(group).head(T - i).groupby(group).tail(T - i - e)
-    return series
+    return trim_periods(series, x, group, i, e)
 
 
 @pf.register_dataframe_method
@@ -109,9 +396,7 @@ def tsgr(
 ) -> pd.Series:
     """Return a grouped time series given an outcome variable, resample window, and aggregation function."""
     series = df.set_index(x).groupby(group)[y].resample(resample).agg(agg).reset_index()
-    T = series[x].nunique()
-    series = series.groupby(group).head(T - i).groupby(group).tail(T - i - e)
-    return series
+    return trim_periods(series, x, group, i, e)
 
 
 @pf.register_dataframe_method
@@ -124,8 +409,10 @@ def ts(
     i: int = 1,
     e: int = 1,
     **kwargs,
-) -> mpl.axes.Axes:
+) -> "mpl.axes.Axes":
     """Return a time series plot given an outcome variable and aggregation function."""
+    import seaborn as sns  # pylint: disable=import-outside-toplevel
+
     series = df.tsg(x=x, y=y, group=group, agg=agg, i=i, e=e)
     return sns.lineplot(data=series, x=x, y=y, hue=group, **kwargs)
 
@@ -141,25 +428,150 @@ def tsr(
     i: int = 1,
     e: int = 1,
     **kwargs,
-) -> mpl.axes.Axes:
+) -> "mpl.axes.Axes":
     """Return a time series plot given an outcome variable, resample window, and aggregation function."""
+    import seaborn as sns  # pylint: disable=import-outside-toplevel
+
     series = df.tsgr(x=x, y=y, group=group, agg=agg, resample=resample, i=i, e=e)
     return sns.lineplot(data=series, x=x, y=y, hue=group, **kwargs)
 
 
-@pf.register_dataframe_method
-def write_parquet(df: pd.DataFrame, path: str) -> None:
-    """Write a dataframe to a path as a parquet."""
+HIVE_NULL = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _escape(value) -> str:
+    """Percent-encode a partition value for its directory name, as pyarrow does."""
+    return urllib.parse.quote(str(value), safe="")
+
+
+def _write_table(df: pd.DataFrame, path: str, row_group_bytes: float, **kwargs) -> str:
+    """Atomically write a dataframe to a parquet file with row groups of about row_group_bytes."""
+    import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    table = pa.Table.from_pandas(df, preserve_index=kwargs.pop("index"))
+    row_bytes = table.nbytes / max(table.num_rows, 1)
+    row_group_size = max(1, int(row_group_bytes / max(row_bytes, 1)))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Hidden, so dataset readers skip files that are still being written
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
     try:
-        df.to_parquet(
+        with os.fdopen(fd, "wb") as f:
+            pq.write_table(table, f, row_group_size=row_group_size, **kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def _parquet_files(path: str, recursive: bool = True) -> List[str]:
+    """Return the parquet files in a directory, skipping hidden ones as readers do."""
+    files = []
+    for root, directories, names in os.walk(path):
+        hidden = (".", "_")
+        directories[:] = [
+            d for d in directories if recursive and not d.startswith(hidden)
+        ]
+        files += [
+            os.path.join(root, name)
+            for name in names
+            if name.endswith(".parquet") and not name.startswith(hidden)
+        ]
+    return files
+
+
+@pf.register_dataframe_method
+def write_parquet(
+    df: pd.DataFrame,
+    path: str,
+    partition_cols: Optional[List[str]] = None,
+    mode: str = "append",
+    row_group_bytes: float = 64e6,
+    compression: str = "snappy",
+    index: Optional[bool] = None,
+    n_jobs: Optional[int] = None,
+) -> List[str]:
+    """Write a dataframe to a path as a parquet, or as a hive-partitioned directory.
+
+    Row groups are sized to about row_group_bytes in memory, partitions are written
+    concurrently, and every file goes through a temporary file and os.replace, so
+    readers never see partial files. Each partitioned write uses new file names, and
+    mode decides what happens to existing files: "append" keeps them,
+    "overwrite_partitions" deletes those in the partitions written, and "overwrite"
+    deletes every other parquet file under path. Old files are deleted only after the
+    new ones are written. Without partition_cols, path is a single file that is
+    replaced in either "append" or "overwrite" mode. Partition values are
+    percent-encoded in directory names, as pyarrow does. Returns the paths of the
+    written files.
+    """
+    if mode not in ["append", "overwrite_partitions", "overwrite"]:
+        raise ValueError(f"Unknown parquet write mode {mode!r}.")
+    if mode == "overwrite_partitions" and not partition_cols:
+        raise ValueError("Mode 'overwrite_partitions' requires partition_cols.")
+    options = {"compression": compression, "index": index}
+    if not partition_cols:
+        return [_write_table(df, path, row_group_bytes, **options)]
+
+    name = f"part-{uuid.uuid4().hex}.parquet"
+    parts = []
+    for values, part in df.groupby(partition_cols, observed=True, dropna=False):
+        values = values if isinstance(values, tuple) else (values,)
+        directory = os.path.join(
             path,
-            engine="fastparquet",
-            compression="snappy",
+            *[
+                f"{column}={HIVE_NULL if pd.isna(value) else _escape(value)}"
+                for column, value in zip(partition_cols, values)
+            ],
         )
-    except OSError:
-        df.to_parquet(
-            path,
-            engine="fastparquet",
-            compression="snappy",
-            row_group_offsets=100_000,
+        parts.append((part.drop(columns=partition_cols), os.path.join(directory, name)))
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        written = list(
+            pool.map(
+                lambda item: _write_table(*item, row_group_bytes, **options), parts
+            )
         )
+
+    if mode == "overwrite":
+        stale = _parquet_files(path)
+    elif mode == "overwrite_partitions":
+        directories = {os.path.dirname(file) for file in written}
+        stale = [file for d in directories for file in _parquet_files(d, False)]
+    else:
+        stale = []
+    for file in set(stale) - set(written):
+        os.unlink(file)
+        directory = os.path.dirname(file)
+        while directory != os.path.normpath(path) and not os.listdir(directory):
+            os.rmdir(directory)  # Drop partitions left empty
+            directory = os.path.dirname(directory)
+    return written
+
+
+def read_parquet(
+    path: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[list] = None,
+    memory_map: bool = True,
+) -> pd.DataFrame:
+    """Read a parquet file or hive-partitioned directory, reading only what is needed.
+
+    Only the given columns are read. Filters, in the [(column, op, value), ...] form
+    of pandas.read_parquet, skip partitions by their directory values and row groups
+    whose min/max statistics cannot match, before being applied to the rows read.
+    """
+    import pyarrow.dataset as ds  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+    # Plain (not dictionary) partition columns, which can hold the null partition
+    table = pq.read_table(
+        path,
+        columns=columns,
+        filters=filters,
+        memory_map=memory_map,
+        partitioning=ds.partitioning(flavor="hive"),
+    )
+    return table.to_pandas()
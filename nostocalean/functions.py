@@ -1,5 +1,7 @@
 """Utility functions."""
 
+import hashlib
+import importlib
 import os
 import re
 import unicodedata
@@ -7,6 +9,7 @@ from contextlib import redirect_stderr, contextmanager
 from typing import Any, Callable, Iterable, List
 
 import numpy as np
+import pandas as pd
 
 
 def lmap(func: Callable, *iterables: Iterable) -> List:
@@ -33,6 +36,24 @@ def skipna(func: Callable, return_val: Any = np.nan) -> Callable:
     return _wrapped
 
 
+class LazyModule:
+    """A module that is imported when one of its attributes is first used."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(importlib.import_module(self.name), attr)
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    """Return a fixed-size digest of the column names, dtypes and values of a dataframe."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
 def clean_name(col_name: str) -> str:
     """Clean column name. Adapted from ericmjl/pyjanitor."""
     col_name = str(col_name).lower()
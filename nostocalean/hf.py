@@ -1,10 +1,28 @@
 """Helper functions for language tasks."""
 
-import torch
-import transformers
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import copy
+import hashlib
+import itertools
+import json
+import os
+import time
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
 import pandas as pd
-from sklearn import metrics
+
+from nostocalean.diskcache import DiskStore
+from nostocalean.functions import LazyModule
+
+# Imported on first use, so that importing hf is fast
+torch = LazyModule("torch")
+transformers = LazyModule("transformers")
+metrics = LazyModule("sklearn.metrics")
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
 
 
 def to_device(inputs: dict, device: int = 0):
@@ -13,27 +31,188 @@ def to_device(inputs: dict, device: int = 0):
     }
 
 
-class ClassificationDataset(torch.utils.data.Dataset):
+def tokenizer_digest(tokenizer: "transformers.PreTrainedTokenizerBase") -> str:
+    """Return a digest of the settings that determine a tokenizer's output."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(
+        repr(
+            (
+                type(tokenizer).__name__,
+                tokenizer.name_or_path,
+                len(tokenizer),
+                tokenizer.model_max_length,
+                tokenizer.truncation_side,
+            )
+        ).encode()
+    )
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        # Truncation and padding are set per call, so they are left out of the digest
+        config = json.loads(backend.to_str())
+        config.pop("truncation", None)
+        config.pop("padding", None)
+        digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class Tokens:
+    """Memory-mapped variable-length token ids written by TokenStore.
+
+    The file holds the number of texts and tokens (int64), the concatenated
+    token ids (int32) and the n + 1 offsets of each text (int64).
+    """
+
+    def __init__(self, path: Path):
+        n, n_tokens = np.fromfile(path, dtype=np.int64, count=2)
+        self.path = path
+        self.ids = np.memmap(path, np.int32, "r", offset=16, shape=(n_tokens,))
+        self.offsets = np.memmap(
+            path, np.int64, "r", offset=16 + 4 * n_tokens, shape=(n + 1,)
+        )
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.ids[self.offsets[index] : self.offsets[index + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Get the number of tokens of each text."""
+        return np.diff(self.offsets)
+
+
+class TokenStore(DiskStore):
+    """Disk store of tokenized texts keyed by tokenizer and text content."""
+
+    def __init__(self, path: str, max_gb: float = 10):
+        super().__init__(Path(path).expanduser(), max_gb, ".tokens")
+
+    @staticmethod
+    def key(tokenizer: "transformers.PreTrainedTokenizerBase", texts: pd.Series) -> str:
+        """Return the key of a tokenizer and a series of texts."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(tokenizer_digest(tokenizer).encode())
+        digest.update(pd.util.hash_pandas_object(texts, index=False).to_numpy())
+        return digest.hexdigest()
+
+    def encode(
+        self,
+        tokenizer: "transformers.PreTrainedTokenizerBase",
+        texts: pd.Series,
+        chunk_size: int = 10_000,
+    ) -> Tokens:
+        """Return memory-mapped token ids of texts, tokenizing them once in chunks."""
+        texts = texts.astype(str)
+        key = self.key(tokenizer, texts)
+        path = self.lookup(key)
+        if path is not None:
+            return Tokens(path)
+
+        def writer(f):
+            f.write(bytes(16))  # Header, filled in once the counts are known
+            lengths = []
+            for start in range(0, len(texts), chunk_size):
+                chunk = texts.iloc[start : start + chunk_size].tolist()
+                ids = tokenizer(chunk, truncation=True)["input_ids"]
+                lengths += [len(row) for row in ids]
+                if ids:
+                    f.write(np.concatenate(ids).astype(np.int32).tobytes())
+            offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+            f.write(offsets.tobytes())
+            f.seek(0)
+            f.write(np.array([len(texts), offsets[-1]], dtype=np.int64).tobytes())
+
+        return Tokens(self.write(key, writer))
+
+
+class _LengthGroupedBatchSampler:
+    """Batches of indices with similar lengths, to reduce padding.
+
+    Indices are shuffled, split into buckets of bucket_batches batches, sorted by
+    length within each bucket and cut into batches, whose order is shuffled.
+    """
+
+    def __init__(
+        self,
+        lengths: np.ndarray,
+        batch_size: int,
+        bucket_batches: int = 50,
+        shuffle: bool = True,
+        seed: int = 0,
+    ):
+        super().__init__()
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.bucket_size = batch_size * bucket_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+
+    def __len__(self):
+        n = len(self.lengths)
+        full, rest = divmod(n, self.bucket_size)
+        return full * -(-self.bucket_size // self.batch_size) + -(
+            -rest // self.batch_size
+        )
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = np.random.default_rng(self.seed + self.epoch)
+        self.epoch += 1
+        n = len(self.lengths)
+        order = rng.permutation(n) if self.shuffle else np.arange(n)
+        batches = []
+        for start in range(0, n, self.bucket_size):
+            bucket = order[start : start + self.bucket_size]
+            bucket = bucket[np.argsort(-self.lengths[bucket], kind="stable")]
+            batches += [
+                bucket[i : i + self.batch_size].tolist()
+                for i in range(0, len(bucket), self.batch_size)
+            ]
+        if self.shuffle:
+            rng.shuffle(batches)
+        return iter(batches)
+
+
+class _ClassificationDataset:
+    """Tokenized texts and labels.
+
+    By default texts are tokenized eagerly and padded to max_length. With a
+    token_store, token ids are read lazily from a memory-mapped file and batches
+    should be padded with collate_fn (and grouped with batch_sampler).
+    """
+
     def __init__(
         self,
         df: pd.DataFrame,
         text_col: str,
         label_col: str,
-        tokenizer: transformers.AutoTokenizer,
+        tokenizer: "transformers.AutoTokenizer",
+        token_store: Optional[TokenStore] = None,
     ):
         self.tokenizer = tokenizer
         self.data = df[[text_col, label_col]].dropna()
-        self.encodings = self.tokenizer(
-            self.data[text_col].values.tolist(),
-            padding="max_length",
-            truncation=True,
-        )
+        self.tokens = None
+        if token_store is None:
+            self.encodings = self.tokenizer(
+                self.data[text_col].values.tolist(),
+                padding="max_length",
+                truncation=True,
+            )
+        else:
+            self.tokens = token_store.encode(tokenizer, self.data[text_col])
+            self.collate_fn = transformers.DataCollatorWithPadding(tokenizer)
         self.labels = self.data[label_col]
 
     def __len__(self):
         return len(self.labels)
 
     def __getitem__(self, index):
+        if self.tokens is not None:
+            return {
+                "input_ids": self.tokens[index].tolist(),
+                "labels": self.labels.iloc[index],
+            }
         inputs = {
             key: torch.tensor(val[index])  # pylint: disable=not-callable
             for key, val in self.encodings.items()
@@ -43,16 +222,285 @@ class ClassificationDataset(torch.utils.data.Dataset):
         )
         return inputs
 
+    def batch_sampler(self, batch_size: int, **kwargs) -> "LengthGroupedBatchSampler":
+        """Return a sampler of length-grouped batches of a lazily tokenized dataset."""
+        sampler = _torch_class("LengthGroupedBatchSampler")
+        return sampler(self.tokens.lengths, batch_size, **kwargs)
+
+
+# Classes subclassing torch.utils.data classes, created on first use
+_TORCH_CLASSES = {
+    "LengthGroupedBatchSampler": (_LengthGroupedBatchSampler, "Sampler"),
+    "ClassificationDataset": (_ClassificationDataset, "Dataset"),
+}
+
+
+def _torch_class(name: str) -> type:
+    """Return a class of this module that subclasses a torch class, importing torch."""
+    if name not in globals():
+        body, base = _TORCH_CLASSES[name]
+        bases = (body, getattr(torch.utils.data, base))
+        namespace = {
+            "__module__": __name__,
+            "__qualname__": name,
+            "__doc__": body.__doc__,
+        }
+        globals()[name] = type(name, bases, namespace)
+    return globals()[name]
+
+
+def __getattr__(name: str):
+    if name not in _TORCH_CLASSES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _torch_class(name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_TORCH_CLASSES))
+
+
+class PredictionCache(DiskStore):
+    """Disk cache of model scores keyed by model, tokenizer settings and text digest.
+
+    Each batch of new scores is one shard file of (64-bit text digest, float32
+    score) records, named by the model's namespace. Shards serving hits are
+    touched, so eviction drops the least recently useful ones first; hits and
+    misses count texts.
+    """
+
+    RECORD = np.dtype([("digest", "<u8"), ("score", "<f4")])
+
+    def __init__(self, path: str, max_gb: float = 1):
+        super().__init__(Path(path).expanduser(), max_gb, ".scores")
+        self.indexes = {}  # Namespace -> (shard names, DataFrame of scores by digest)
+
+    @staticmethod
+    def namespace(model: "SentimentModel") -> str:
+        """Return the namespace of a model's scores."""
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{model.model_name}|{model.mode}|".encode())
+        digest.update(tokenizer_digest(model.tokenizer).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def digests(texts: List[str]) -> np.ndarray:
+        """Return 64-bit digests of texts."""
+        return pd.util.hash_array(np.array(texts, dtype=object))
+
+    def _index(self, namespace: str) -> pd.DataFrame:
+        """Return the scores of a namespace, reading shards written since the last call."""
+        shards, index = self.indexes.get(namespace, ([], None))
+        current = {path.name for path in self.path.glob(f"{namespace}-*{self.suffix}")}
+        if set(shards) - current:
+            # Shards were evicted: reload the rest, so that digests they share with
+            # evicted shards and shards written again under the same name are found
+            shards, index = [], None
+        frames = [] if index is None else [index]
+        for name in sorted(current - set(shards)):
+            try:
+                records = np.fromfile(self.path / name, dtype=self.RECORD)
+            except FileNotFoundError:
+                continue
+            frames.append(
+                pd.DataFrame(
+                    {"score": records["score"], "shard": len(shards)},
+                    index=records["digest"],
+                )
+            )
+            shards.append(name)
+        if frames:
+            index = pd.concat(frames)
+            index = index[~index.index.duplicated(keep="last")]
+        self.indexes[namespace] = (shards, index)
+        return index
+
+    def get(self, namespace: str, texts: List[str]) -> tuple:
+        """Return cached scores of texts (NaN if missing) and the mask of misses."""
+        index = self._index(namespace)
+        if index is None:
+            self.misses += len(texts)
+            return np.full(len(texts), np.nan), np.ones(len(texts), dtype=bool)
+        found = index.reindex(self.digests(texts))
+        scores = np.array(found["score"], dtype=float)
+        missing = np.isnan(scores)
+        self.hits += int((~missing).sum())
+        self.misses += int(missing.sum())
+        shards = self.indexes[namespace][0]
+        for shard in found["shard"].dropna().unique():
+            try:
+                os.utime(self.path / shards[int(shard)])  # Mark as recently used
+            except FileNotFoundError:
+                pass
+        return scores, missing
+
+    def put(self, namespace: str, texts: List[str], scores: np.ndarray) -> None:
+        """Write the scores of texts as a new shard."""
+        records = np.empty(len(texts), dtype=self.RECORD)
+        records["digest"] = self.digests(texts)
+        records["score"] = scores
+        shard = hashlib.blake2b(records.tobytes(), digest_size=8).hexdigest()
+        self.write(f"{namespace}-{shard}", lambda f: f.write(records.tobytes()))
+
+
+@contextmanager
+def num_threads(threads: Optional[int]):
+    """Temporarily set the number of CPU threads used by torch."""
+    if threads is None:
+        yield
+        return
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield consecutive lists of at most size items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _quantize_dynamic(model: "torch.nn.Module") -> Optional["torch.nn.Module"]:
+    """Return a model with int8 dynamic quantization of its linear layers, or None.
+
+    None means eager mode quantization is unavailable: torch.ao.quantization is
+    deprecated (removal announced for torch 2.10) or this build has no quantized engine.
+    """
+    with warnings.catch_warnings():
+        # The deprecation is documented in SentimentModel.optimized
+        warnings.filterwarnings(
+            "ignore", message=".*quantiz", category=DeprecationWarning
+        )
+        warnings.filterwarnings("ignore", message=".*quantiz", category=UserWarning)
+        quantization = getattr(getattr(torch, "ao", None), "quantization", None)
+        quantize_dynamic = getattr(quantization, "quantize_dynamic", None)
+        if quantize_dynamic is None:
+            return None
+        try:
+            return quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        except (RuntimeError, NotImplementedError):
+            return None
+
 
 class SentimentModel:
-    def __init__(self, device: int = 0):
+    def __init__(
+        self,
+        device: int = 0,
+        model_name: str = MODEL_NAME,
+        cache: Optional[PredictionCache] = None,
+    ):
         self.device = device
-        self.model = AutoModelForSequenceClassification.from_pretrained(
-            "distilbert-base-uncased-finetuned-sst-2-english"
+        self.model_name = model_name
+        self.cache = cache
+        self.model = transformers.AutoModelForSequenceClassification.from_pretrained(
+            model_name
         ).to(self.device)
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            "distilbert-base-uncased-finetuned-sst-2-english"
-        )
+        self.model.eval()
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+        self.mode = "fp32"
+        self.threads = None
+        self.grad_mode = torch.no_grad
+
+    def optimized(
+        self, quantize: bool = True, threads: Optional[int] = None
+    ) -> "SentimentModel":
+        """Return a CPU copy that scores under inference_mode, with int8 dynamic quantization.
+
+        Quantization uses torch.ao.quantization.quantize_dynamic, which torch has
+        deprecated; where it is missing or fails, the copy is left unquantized (as with
+        quantize=False) and a warning is issued. threads sets the torch CPU thread
+        count used when scoring with the copy.
+        """
+        model = copy.copy(self)
+        model.device = "cpu"
+        model.model = copy.deepcopy(self.model).cpu()
+        if quantize:
+            quantized = _quantize_dynamic(model.model)
+            if quantized is None:
+                warnings.warn(
+                    "Dynamic int8 quantization is unavailable in this torch build, "
+                    "so the optimized model is not quantized (quantize=False)."
+                )
+                model.model = copy.deepcopy(self.model).cpu()  # May be partly converted
+                quantize = False
+            else:
+                model.model = quantized
+        model.mode = "int8" if quantize else "fp32-inference"
+        model.threads = threads
+        model.grad_mode = torch.inference_mode
+        return model
+
+    def _cached_predict(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Return scores from the prediction cache, running the model on misses only."""
+        if self.cache is None:
+            return self._predict(texts, batch_size)
+        namespace = self.cache.namespace(self)
+        scores, missing = self.cache.get(namespace, texts)
+        if missing.any():
+            new = [texts[i] for i in np.flatnonzero(missing)]
+            scores[missing] = self._predict(new, batch_size)
+            self.cache.put(namespace, new, scores[missing])
+        return scores
+
+    def _predict(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Return positive-class probabilities, batching texts of similar token length."""
+        encodings = self.tokenizer(texts, truncation=True)["input_ids"]
+        order = np.argsort([len(ids) for ids in encodings], kind="stable")
+        scores = np.empty(len(texts))
+        with self.grad_mode():
+            for start in range(0, len(order), batch_size):
+                batch = order[start : start + batch_size]
+                inputs = self.tokenizer.pad(
+                    {"input_ids": [encodings[i] for i in batch]}, return_tensors="pt"
+                )
+                inputs = to_device(inputs, self.device)
+                logits = self.model(**inputs).logits
+                scores[batch] = logits.softmax(dim=-1)[:, 1].cpu().numpy()
+        return scores
+
+    def iter_scores(
+        self,
+        texts: Iterable[str],
+        batch_size: int = 64,
+        chunk_size: int = 100_000,
+        threads: Optional[int] = None,
+    ) -> Iterator[np.ndarray]:
+        """Yield scores of consecutive chunks of texts, tokenizing one chunk at a time.
+
+        Within a chunk, duplicate texts are scored once, texts found in the
+        prediction cache are not rescored, and batches are padded to their longest
+        text. Missing texts are scored NaN.
+        """
+        for chunk in _chunks(texts, chunk_size):
+            codes, uniques = pd.factorize(pd.Series(chunk, dtype=object))
+            scores = np.empty(0)
+            if len(uniques):  # Otherwise every text in the chunk is missing
+                with num_threads(threads or self.threads):
+                    scores = self._cached_predict(
+                        [str(text) for text in uniques], batch_size
+                    )
+            out = np.full(len(codes), np.nan)
+            out[codes >= 0] = scores[codes[codes >= 0]]
+            yield out
+
+    def score(
+        self,
+        texts: Iterable[str],
+        batch_size: int = 64,
+        chunk_size: int = 100_000,
+        threads: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return positive-class probabilities of texts (e.g. a Series) in input order."""
+        scores = list(self.iter_scores(texts, batch_size, chunk_size, threads))
+        return np.concatenate(scores) if scores else np.empty(0)
 
     def __call__(self, text: str):
         with torch.no_grad():
@@ -68,3 +516,95 @@ class SentimentModel:
                 outputs.logits.softmax(dim=-1).detach().cpu().numpy().flatten()[1]
             )
         return prediction
+
+
+def accuracy_drift(
+    reference: SentimentModel,
+    candidate: SentimentModel,
+    texts: Sequence[str],
+    labels: Sequence[int],
+    batch_size: int = 64,
+) -> pd.DataFrame:
+    """Compare classification metrics of two models (e.g. fp32 and int8) on labeled texts.
+
+    The drift column is candidate minus reference; agreement is the share of texts
+    given the same label and max_abs_diff the largest difference in scores.
+    """
+    labels = np.asarray(labels)
+    scores = {
+        "reference": reference.score(texts, batch_size),
+        "candidate": candidate.score(texts, batch_size),
+    }
+    table = pd.DataFrame(
+        {
+            name: {
+                "accuracy": metrics.accuracy_score(labels, score > 0.5),
+                "f1": metrics.f1_score(labels, score > 0.5),
+                "roc_auc": metrics.roc_auc_score(labels, score),
+                "log_loss": metrics.log_loss(labels, score, labels=[0, 1]),
+            }
+            for name, score in scores.items()
+        }
+    )
+    table["drift"] = table["candidate"] - table["reference"]
+    table.loc["agreement", "drift"] = metrics.accuracy_score(
+        scores["reference"] > 0.5, scores["candidate"] > 0.5
+    )
+    table.loc["max_abs_diff", "drift"] = np.max(
+        np.abs(scores["candidate"] - scores["reference"]), initial=0.0
+    )
+    return table
+
+
+def _sample_texts(n: int) -> List[str]:
+    """Return n distinct sentences of varying length for benchmarking."""
+    words = "the movie was not very good but the acting and music were great".split()
+    rng = np.random.default_rng(0)
+    return [
+        " ".join(rng.choice(words, rng.integers(4, 64))) + f" {i}" for i in range(n)
+    ]
+
+
+def benchmark(
+    model_name: str = MODEL_NAME,
+    texts: Optional[Sequence[str]] = None,
+    batch_sizes: Sequence[int] = (1, 8, 32, 128),
+    threads: Optional[int] = None,
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Compare CPU throughput and per-batch latency of fp32 and optimized modes.
+
+    Each configuration is timed repeats times after a warm-up run and the fastest
+    run is reported.
+    """
+    texts = _sample_texts(256) if texts is None else list(texts)
+    fp32 = SentimentModel(device="cpu", model_name=model_name)
+    models = [
+        fp32,
+        fp32.optimized(quantize=False, threads=threads),
+        fp32.optimized(quantize=True, threads=threads),
+    ]
+    rows = []
+    for model in models:
+        for batch_size in batch_sizes:
+            model.score(texts[:batch_size], batch_size, threads=threads)  # Warm up
+            seconds = min(
+                _timed(lambda: model.score(texts, batch_size, threads=threads))
+                for _ in range(repeats)
+            )
+            rows.append(
+                {
+                    "mode": model.mode,
+                    "batch_size": batch_size,
+                    "texts_per_second": len(texts) / seconds,
+                    "batch_latency_ms": 1e3 * seconds / -(-len(texts) // batch_size),
+                }
+            )
+    return pd.DataFrame(rows).set_index(["mode", "batch_size"])
+
+
+def _timed(func) -> float:
+    """Return the seconds taken by func()."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
@@ -1,5 +1,18 @@
 """Standard nostocalean functions and plot themes."""
 
 from .functions import clean_name, lmap, skipna, suppress
-from .plotting import palette
 from .flavor import mem, normalize, winsorize
+
+
+def set_theme() -> None:
+    """Apply the nostocalean plot style and palette."""
+    from . import plotting  # pylint: disable=import-outside-toplevel,unused-import
+
+
+def __getattr__(name: str):
+    # Importing plotting applies the plot theme, so it waits until the palette is used
+    if name == "palette":
+        from .plotting import palette  # pylint: disable=import-outside-toplevel
+
+        return palette
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,126 @@
+"""Writer of pandas dataframes as RDS files, which base R reads with readRDS."""
+
+import gzip
+import struct
+from typing import BinaryIO, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+# SEXP types and flag bits of R's serialization format (version 2, XDR)
+NILVALUE, SYMSXP, LISTSXP, CHARSXP = 254, 1, 2, 9
+LGLSXP, INTSXP, REALSXP, STRSXP, VECSXP = 10, 13, 14, 16, 19
+IS_OBJECT, HAS_ATTR, HAS_TAG = 1 << 8, 1 << 9, 1 << 10
+UTF8 = 1 << 3
+R_VERSION, MIN_READER_VERSION = 0x040201, 0x020300
+
+Vector = Tuple[int, object, dict]  # (SEXP type, values, attributes)
+
+
+def _strings(values: List[Optional[str]], attributes: Optional[dict] = None) -> Vector:
+    return STRSXP, values, attributes or {}
+
+
+def _int_vector(values: np.ndarray, na: np.ndarray, sexp_type: int = INTSXP) -> Vector:
+    """Return an R integer (or logical) vector, marking missing values with NA_integer_."""
+    values = values.astype(np.int32)
+    values[na] = INT32_MIN
+    return sexp_type, values, {}
+
+
+def r_vector(series: pd.Series) -> Vector:
+    """Return the R vector of a column, converted as rtransfer.to_r_vector does."""
+    dtype = series.dtype
+    na = series.isna().to_numpy()
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        _, codes, _ = _int_vector(series.cat.codes.to_numpy() + 1, na)
+        levels = _strings([str(level) for level in dtype.categories])
+        return INTSXP, codes, {"levels": levels, "class": _strings(["factor"])}
+    if pd.api.types.is_bool_dtype(dtype):
+        values = series.to_numpy(dtype=bool, na_value=False)
+        return _int_vector(values, na, LGLSXP)
+    if pd.api.types.is_integer_dtype(dtype):
+        values = series.to_numpy(dtype=np.int64, na_value=0)
+        if len(values) == 0 or (values.min() > INT32_MIN and values.max() <= INT32_MAX):
+            return _int_vector(values, na)
+        return REALSXP, series.to_numpy(dtype=float, na_value=np.nan), {}
+    if pd.api.types.is_float_dtype(dtype):
+        return REALSXP, series.to_numpy(dtype=float, na_value=np.nan), {}
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        values = (
+            series.dt.tz_convert("UTC").dt.tz_localize(None) if series.dt.tz else series
+        )
+        seconds = values.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+        seconds[na] = np.nan
+        return REALSXP, seconds, {"class": _strings(["POSIXct", "POSIXt"])}
+
+    return _strings([None if missing else str(v) for v, missing in zip(series, na)])
+
+
+def r_data_frame(df: pd.DataFrame) -> Vector:
+    """Return the R data.frame of a dataframe, with compact row names."""
+    attributes = {
+        "names": _strings([str(column) for column in df.columns]),
+        "class": _strings(["data.frame"]),
+        "row.names": (INTSXP, np.array([INT32_MIN, -len(df)]), {}),
+    }
+    return VECSXP, [r_vector(df[column]) for column in df.columns], attributes
+
+
+class _Serializer:
+    """Writes R objects in the XDR serialization format."""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+
+    def int(self, value: int) -> None:
+        self.f.write(struct.pack(">i", value))
+
+    def string(self, value: Optional[str]) -> None:
+        if value is None:
+            self.int(CHARSXP)
+            self.int(-1)  # NA_character_
+            return
+        encoded = value.encode("utf-8")
+        self.int(CHARSXP | UTF8 << 12)
+        self.int(len(encoded))
+        self.f.write(encoded)
+
+    def vector(self, vector: Vector) -> None:
+        """Write a vector, followed by its pairlist of attributes."""
+        sexp_type, values, attributes = vector
+        flags = sexp_type
+        if attributes:
+            flags |= HAS_ATTR | (IS_OBJECT if "class" in attributes else 0)
+        self.int(flags)
+        self.int(len(values))
+        if sexp_type == STRSXP:
+            for value in values:
+                self.string(value)
+        elif sexp_type == VECSXP:
+            for value in values:
+                self.vector(value)
+        else:
+            dtype = ">f8" if sexp_type == REALSXP else ">i4"
+            self.f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+        for name, value in attributes.items():
+            self.int(LISTSXP | HAS_TAG)
+            self.int(SYMSXP)
+            self.string(name)
+            self.vector(value)
+        if attributes:
+            self.int(NILVALUE)
+
+
+def write_rds(df: pd.DataFrame, f: BinaryIO, compresslevel: int = 1) -> None:
+    """Write a dataframe to a binary stream as a gzipped RDS file of an R data.frame."""
+    with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=compresslevel) as gz:
+        gz.write(b"X\n")
+        serializer = _Serializer(gz)
+        for value in [2, R_VERSION, MIN_READER_VERSION]:
+            serializer.int(value)
+        serializer.vector(r_data_frame(df))
@@ -1,8 +1,19 @@
+import hashlib
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+from rpy2 import rinterface
 from rpy2.robjects.packages import importr
 from rpy2.robjects import Formula, pandas2ri
 from rpy2.robjects import r as r_env
 import rpy2
 import numpy as np
+import pandas as pd
+
+from nostocalean import rtransfer
+from nostocalean.functions import fingerprint
 
 pandas2ri.activate()
 
@@ -25,8 +36,158 @@ def _convert_vector(lv):
         return lv
 
 
-def convert(lv):
-    """Recursively convert a ListVector"""
+def _attribute(sexp, name: str):
+    """Return an R attribute without conversion, or None if it is not set."""
+    try:
+        value = sexp.do_slot(name)
+    except LookupError:
+        return None
+    return None if value is rinterface.NULL else value
+
+
+def _names(sexp) -> Optional[List[str]]:
+    """Return the names of an R object, or None if it has none."""
+    names = _attribute(sexp, "names")
+    return None if names is None else [str(name) for name in names]
+
+
+def _to_array(sexp):
+    """Convert an atomic R vector to a flat NumPy array or categorical.
+
+    Doubles are returned as views of R's memory; integers and logicals are viewed
+    unless they contain NA, in which case they are copied to floats with NaN.
+    """
+    if isinstance(sexp, (rinterface.IntSexpVector, rinterface.BoolSexpVector)):
+        array = np.asarray(sexp)
+        na = array == rtransfer.INT32_MIN
+        levels = _attribute(sexp, "levels")
+        if levels is not None:  # Factor
+            codes = np.where(na, -1, array - 1)
+            return pd.Categorical.from_codes(codes, [str(level) for level in levels])
+        if isinstance(sexp, rinterface.BoolSexpVector) and not na.any():
+            return array.astype(bool)
+        if na.any():
+            array = array.astype(float)
+            array[na] = np.nan
+        return array
+    if isinstance(sexp, rinterface.FloatSexpVector):
+        return np.asarray(sexp)
+    if isinstance(sexp, rinterface.StrSexpVector):
+        return np.array(
+            [
+                None if value is rinterface.NA_Character else str(value)
+                for value in sexp
+            ],
+            dtype=object,
+        )
+    if isinstance(sexp, rinterface.ComplexSexpVector):
+        return np.array(list(sexp), dtype=complex)
+    return None
+
+
+def to_numpy(sexp):
+    """Convert an atomic R vector or matrix, keeping its dims and names.
+
+    Matrices with dimnames become DataFrames, named vectors become Series and
+    unnamed length-one vectors become scalars.
+    """
+    array = _to_array(sexp)
+    if array is None:
+        return sexp
+    dims = _attribute(sexp, "dim")
+    if dims is not None and not isinstance(array, pd.Categorical):
+        array = array.reshape(tuple(dims), order="F")
+        dimnames = _attribute(sexp, "dimnames")
+        if len(dims) == 2 and dimnames is not None:
+            index, columns = (
+                None if names is rinterface.NULL else [str(n) for n in names]
+                for names in dimnames
+            )
+            return pd.DataFrame(array, index=index, columns=columns)
+        return array
+    names = _names(sexp)
+    if names is not None:
+        return pd.Series(array, index=names)
+    if len(array) == 1:
+        value = array[0]  # A NumPy scalar, or a str/None from a character vector
+        return value.item() if isinstance(value, np.generic) else value
+    return array
+
+
+def _leaf(sexp):
+    """Convert an R object that is not traversed further."""
+    if sexp is rinterface.NULL:
+        return None
+    classes = _attribute(sexp, "class")
+    if classes is not None and "data.frame" in list(classes):
+        columns = [
+            rinterface.ListSexpVector.__getitem__(sexp, i) for i in range(len(sexp))
+        ]
+        return pd.DataFrame(
+            {name: _to_array(column) for name, column in zip(_names(sexp), columns)}
+        )
+    if _to_array(sexp) is not None:
+        return to_numpy(sexp)
+    deparsed = rinterface.baseenv["deparse"](sexp)
+    return " ".join(str(line).strip() for line in deparsed)
+
+
+def _is_list(sexp) -> bool:
+    """Check whether an R object is a list that is not a data.frame."""
+    classes = _attribute(sexp, "class")
+    return isinstance(sexp, rinterface.ListSexpVector) and (
+        classes is None or "data.frame" not in list(classes)
+    )
+
+
+def _field(sexp, path: str):
+    """Return the element of a nested R list at a path of names separated by $."""
+    for name in path.split("$"):
+        names = _names(sexp) if _is_list(sexp) else None
+        if names is None or name not in names:
+            raise KeyError(f"R object has no field {path!r}.")
+        sexp = rinterface.ListSexpVector.__getitem__(sexp, names.index(name))
+    return sexp
+
+
+def convert_numpy(sexp, fields: Optional[Iterable[str]] = None):
+    """Convert an R object with NumPy/pandas leaves, traversing lists without recursion.
+
+    Named lists become dicts and unnamed lists become lists. If fields are given
+    (names, or paths like "summary$se"), only those elements are converted and
+    a dict keyed by field is returned.
+    """
+    if fields is not None:
+        return {field: convert_numpy(_field(sexp, field)) for field in fields}
+
+    root = [None]
+    stack = [(root, 0, sexp)]
+    while stack:
+        parent, key, node = stack.pop()
+        if not _is_list(node):
+            parent[key] = _leaf(node)
+            continue
+        names = _names(node)
+        if names is None or len(set(names)) < len(names) or "" in names:
+            keys = list(range(len(node)))
+            parent[key] = container = [None] * len(node)
+        else:
+            keys = names
+            parent[key] = container = dict.fromkeys(names)
+        for i, child_key in enumerate(keys):
+            stack.append(
+                (container, child_key, rinterface.ListSexpVector.__getitem__(node, i))
+            )
+    return root[0]
+
+
+def convert(lv, numpy: bool = False, fields: Optional[Iterable[str]] = None):
+    """Recursively convert a ListVector
+
+    With numpy=True (or fields), use convert_numpy instead.
+    """
+    if numpy or fields is not None:
+        return convert_numpy(lv, fields)
     if isinstance(lv, rpy2.robjects.vectors.ListVector):
         top_level_dict = _convert_vector(lv)
         for key, val in list(top_level_dict.items()):
@@ -39,6 +200,140 @@ def convert(lv):
         return _convert_vector(lv)
 
 
+def _fingerprint(value) -> str:
+    """Return a digest of an input's content, or the identity of an R object."""
+    if isinstance(value, rpy2.rinterface.Sexp):
+        return f"sexp:{value.rid}"
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    if isinstance(value, pd.DataFrame):
+        return fingerprint(value)
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+class RSession:
+    """Persistent state of the embedded R session used by execute_r.
+
+    Packages are loaded once, inputs are reassigned only when their content changes,
+    inputs unused for max_idle calls are removed and R's gc() runs every gc_every
+    calls. Time spent in each phase is accumulated in timings.
+    """
+
+    def __init__(self, max_idle: int = 100, gc_every: int = 100):
+        self.max_idle = max_idle
+        self.gc_every = gc_every
+        self.packages = set()
+        self.inputs = {}  # Name -> fingerprint of the assigned value
+        self.last_used = {}
+        self.calls = 0
+        self.counts = Counter()
+        self.timings = defaultdict(float)
+
+    @contextmanager
+    def _phase(self, name: str):
+        """Accumulate the time spent in a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def load(self, packages: Iterable[str], call=r_env.eval) -> None:
+        """Load packages that have not been loaded in this session."""
+        for pkg in packages:
+            if pkg in self.packages:
+                self.counts["library_skipped"] += 1
+                continue
+            call(f"library({pkg})")
+            self.packages.add(pkg)
+            self.counts["library"] += 1
+
+    def assign(self, inputs: dict, overwrite: bool = False, columnar: bool = False):
+        """Assign inputs whose content differs from what this session last assigned."""
+        for k, val in inputs.items():
+            key = _fingerprint(val)
+            self.last_used[k] = self.calls
+            if not overwrite and self.inputs.get(k) == key and r_env.exists(k)[0]:
+                self.counts["reused"] += 1
+                continue
+            if columnar and isinstance(val, pd.DataFrame):
+                val = rtransfer.to_r(val)
+            r_env.assign(k, val)
+            self.inputs[k] = key
+            self.counts["assigned"] += 1
+
+    def release(self, names: Optional[Iterable[str]] = None) -> None:
+        """Remove inputs (all assigned inputs by default) from R and run the collector."""
+        names = list(self.inputs if names is None else names)
+        for k in names:
+            self.last_used.pop(k, None)
+        names = [k for k in names if self.inputs.pop(k, None) is not None]
+        if names:
+            r_env["rm"](
+                list=rpy2.robjects.StrVector(names), envir=rpy2.robjects.globalenv
+            )
+            self.counts["removed"] += len(names)
+        r_env["gc"]()
+        self.counts["gc"] += 1
+
+    def collect(self) -> None:
+        """Remove idle inputs and periodically run R's garbage collector."""
+        idle = [
+            k for k, last in self.last_used.items() if self.calls - last > self.max_idle
+        ]
+        if idle or self.calls % self.gc_every == 0:
+            self.release(idle)
+
+    def execute(
+        self,
+        r_code: str,
+        packages: list,
+        inputs: dict,
+        outputs: list,
+        overwrite=False,
+        side_effect=False,
+        columnar=False,
+        numpy=False,
+        fields=None,
+    ) -> dict:
+        """Execute R code in this session and return the converted outputs."""
+        call = (
+            r_env if side_effect else r_env.eval
+        )  # Ignore print statements if side_effect is False
+        self.calls += 1
+        with self._phase("packages"):
+            self.load(packages, call)
+        with self._phase("inputs"):
+            self.assign(inputs, overwrite, columnar)
+        with self._phase("code"):
+            call(r_code)
+        with self._phase("outputs"):
+            if numpy or fields is not None:
+                # Read outputs without the activated pandas2ri conversion
+                result = {
+                    o: convert_numpy(rinterface.globalenv.find(o), fields)
+                    for o in outputs
+                }
+            else:
+                result = {o: convert(r_env.get(o)) for o in outputs}
+        with self._phase("gc"):
+            self.collect()
+        return result
+
+    def stats(self) -> dict:
+        """Return call counters and the seconds spent in each phase."""
+        return {"calls": self.calls, **self.counts, **self.timings}
+
+
+session = RSession()
+
+
 def execute_r(
     r_code: str,
     packages: list,
@@ -46,18 +341,26 @@ def execute_r(
     outputs: list,
     overwrite=False,
     side_effect=False,
+    columnar=False,
+    r_session: Optional[RSession] = None,
+    numpy=False,
+    fields=None,
 ) -> dict:
     """
     Execute R code and return the result.
+    With columnar=True, dataframe inputs are transferred with nostocalean.rtransfer.
+    Packages and unchanged inputs are reused from the session (the module session
+    by default); overwrite=True reassigns every input.
+    With numpy=True outputs are converted by convert_numpy, restricted to fields if given.
     """
-    call = (
-        r_env if side_effect else r_env.eval
-    )  # Ignore print statements if side_effect is False
-    for pkg in packages:
-        call(f"library({pkg})")
-    for k, val in inputs.items():
-        if overwrite or not r_env.exists(k)[0]:
-            r_env.assign(k, val)
-    call(r_code)
-    return {o: convert(r_env.get(o)) for o in outputs}
-
+    return (r_session or session).execute(
+        r_code,
+        packages,
+        inputs,
+        outputs,
+        overwrite,
+        side_effect,
+        columnar,
+        numpy,
+        fields,
+    )
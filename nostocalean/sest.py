@@ -1,13 +1,23 @@
 """Hacky methods for calling fixest on an R container."""
 
+import asyncio
+import atexit
 import os
+import queue
 import subprocess
 import re
 import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
+from nostocalean.diskcache import DiskStore
+from nostocalean.functions import fingerprint
+from nostocalean.rds import write_rds
+
 
 class ContainerConfig:
     """Container location and cache path config."""
@@ -15,6 +25,7 @@ class ContainerConfig:
     def __init__(self):
         self.container_path = None
         self.cache_path = None
+        self.cache_max_gb = float(os.environ.get("R_DATASET_MAX_GB", 10))
         try:
             self.container_path = Path(os.environ["R_CONTAINER_PATH"]).resolve()
             self.cache_path = Path(os.environ["R_DATASET_PATH"]).resolve()
@@ -25,33 +36,312 @@ class ContainerConfig:
 config = ContainerConfig()
 
 
+class DatasetStore(DiskStore):
+    """Content-addressed RDS store of regression datasets with LRU eviction.
+
+    Datasets are written as RDS files, which base R reads with readRDS, so the
+    container only needs R and fixest.
+    """
+
+    def __init__(self, path: Path, max_gb: float = 10):
+        super().__init__(path, max_gb, suffix=".rds")
+
+    def put(self, df: pd.DataFrame) -> str:
+        """Store a dataframe if it is not cached yet and return its file name."""
+        key = fingerprint(df)
+        if self.lookup(key) is None:
+            self.write(key, lambda f: write_rds(df, f))
+        return self.file(key).name
+
+
+store = (
+    None
+    if config.cache_path is None
+    else DatasetStore(config.cache_path, config.cache_max_gb)
+)
+
+
+SERVER_SCRIPT = """
+library(fixest)
+con <- file("stdin", "r")
+while (length(line <- readLines(con, n = 1)) > 0) {
+  out <- tryCatch(
+    c(capture.output(print(eval(parse(text = line), envir = globalenv()))), "%s"),
+    error = function(e) c(conditionMessage(e), "%s")
+  )
+  writeLines(out)
+  flush(stdout())
+}
+"""
+OK_SENTINEL = "<<<nostocalean:ok>>>"
+ERROR_SENTINEL = "<<<nostocalean:error>>>"
+
+
+class RWorker:
+    """Long-lived R process that keeps fixest loaded and evaluates one job per line.
+
+    Each job is a single line of R code; the worker replies with the printed result
+    followed by a sentinel line. By default R runs in the configured container, but
+    any command that speaks the same protocol can be used instead.
+    """
+
+    def __init__(self, command: Optional[List[str]] = None, max_restarts: int = 3):
+        if command is None:
+            if config.container_path is None or store is None:
+                raise RuntimeError("No R container or dataset path specified.")
+            command = [
+                "singularity",
+                "exec",
+                "--bind",
+                f"{store.path}:/cache",
+                str(config.container_path),
+                "Rscript",
+                "-e",
+                SERVER_SCRIPT % (OK_SENTINEL, ERROR_SENTINEL),
+            ]
+        self.command = command
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.process = None
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    def start(self) -> None:
+        """Start the worker process if it is not running."""
+        if self.process is None or self.process.poll() is not None:
+            self.process = subprocess.Popen(
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+
+    def stream(self, code: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Send a job to the worker and yield its output lines as they arrive.
+
+        If the job runs longer than timeout seconds the worker is killed (and restarted
+        for the next job) and TimeoutError is raised. Closing the generator before the
+        job finishes also restarts the worker, so its remaining output is never read as
+        the result of a later job.
+        """
+        if "\n" in code:
+            raise ValueError("Worker jobs must be a single line of R code.")
+        with self.lock:
+            self.start()
+            process = self.process
+            expired = threading.Event()
+
+            def expire():
+                expired.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, expire) if timeout is not None else None
+            try:
+                if timer is not None:
+                    timer.start()
+                try:
+                    process.stdin.write(code + "\n")
+                    process.stdin.flush()
+                except BrokenPipeError:
+                    process.wait()
+                lines = []
+                finished = False
+                for line in process.stdout:
+                    line = line.rstrip("\n")
+                    if line == OK_SENTINEL:
+                        finished = True
+                        self.restarts = 0
+                        return
+                    if line == ERROR_SENTINEL:
+                        finished = True
+                        raise RuntimeError("\n".join(lines))
+                    lines.append(line)
+                    yield line
+                finished = True  # The process closed its output
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                if not finished:
+                    # The consumer stopped mid-job, so discard the rest of its output
+                    # by killing the worker, which restarts for the next job
+                    process.kill()
+                    process.wait()
+                    self.process = None
+
+            # The process exited before finishing the job, so restart it and retry
+            # unless it timed out, output was already streamed, or restarts are spent
+            returncode = process.wait()
+            self.process = None
+            if expired.is_set():
+                raise TimeoutError(f"R job timed out after {timeout} seconds.")
+            if lines or self.restarts >= self.max_restarts:
+                raise RuntimeError(f"R worker exited with code {returncode}.")
+            self.restarts += 1
+        yield from self.stream(code, timeout)
+
+    def run(self, code: str, timeout: Optional[float] = None) -> str:
+        """Evaluate a job on the worker and return its printed output."""
+        return "\n".join(self.stream(code, timeout)) + "\n"
+
+    def close(self, timeout: float = 10) -> None:
+        """Shut down the worker by closing its input, killing it if it does not exit."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def __enter__(self) -> "RWorker":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+worker = None
+
+
+def start_worker(command: Optional[List[str]] = None) -> RWorker:
+    """Start a persistent R worker that sest.reg uses instead of one Rscript per call."""
+    global worker  # pylint: disable=global-statement
+    stop_worker()
+    worker = RWorker(command)
+    worker.start()
+    return worker
+
+
+def stop_worker() -> None:
+    """Shut down the persistent R worker."""
+    global worker  # pylint: disable=global-statement
+    if worker is not None:
+        worker.close()
+        worker = None
+
+
+class WorkerPool:
+    """Bounded pool of R workers that runs sest regressions concurrently."""
+
+    def __init__(self, size: int = 4, command: Optional[List[str]] = None):
+        if store is None:
+            raise RuntimeError("No dataset path specified.")
+        self.idle: "queue.Queue[RWorker]" = queue.Queue()
+        for _ in range(size):
+            self.idle.put(RWorker(command))
+        self.workers = list(self.idle.queue)
+        self.executor = ThreadPoolExecutor(max_workers=size)
+
+    def _run(self, code: str, timeout: Optional[float]) -> str:
+        """Run a job on the next idle worker."""
+        r_worker = self.idle.get()
+        try:
+            return r_worker.run(code, timeout)
+        finally:
+            self.idle.put(r_worker)
+
+    def submit(
+        self,
+        fml: str,
+        data: pd.DataFrame,
+        se: str = "hetero",
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """Submit a feols regression and return a future of its summary."""
+        name = store.put(data[_columns(fml, data)])
+        return self.executor.submit(self._run, _job(fml, name, se), timeout)
+
+    def submit_many(
+        self, jobs: Iterable[tuple], timeout: Optional[float] = None
+    ) -> List[Future]:
+        """Submit (fml, data[, se]) jobs, writing each distinct dataset to the store once."""
+        names: Dict[Tuple[int, Tuple[str, ...]], str] = {}
+        futures = []
+        for fml, data, *se in jobs:
+            columns = _columns(fml, data)
+            key = (id(data), tuple(columns))
+            if key not in names:
+                names[key] = store.put(data[columns])
+            code = _job(fml, names[key], se[0] if se else "hetero")
+            futures.append(self.executor.submit(self._run, code, timeout))
+        return futures
+
+    def as_completed(
+        self, jobs: Iterable[tuple], timeout: Optional[float] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """Yield (job index, summary) in completion order, raising the first job error."""
+        futures = self.submit_many(jobs, timeout)
+        index = {future: i for i, future in enumerate(futures)}
+        for future in as_completed(futures):
+            yield index[future], future.result()
+
+    async def aiter(
+        self, jobs: Iterable[tuple], timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """Asynchronously yield (job index, summary) in completion order."""
+        futures = self.submit_many(jobs, timeout)
+        wrapped = {asyncio.wrap_future(future): i for i, future in enumerate(futures)}
+        pending = set(wrapped)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield wrapped[future], future.result()
+
+    def close(self) -> None:
+        """Wait for submitted jobs and shut down every worker."""
+        self.executor.shutdown(wait=True)
+        for r_worker in self.workers:
+            r_worker.close()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def _columns(fml: str, data: pd.DataFrame) -> List[str]:
+    """Return the dataframe columns referenced by a formula."""
+    return sorted(set(re.findall(r"[\w']+", fml)) & set(data.columns))
+
+
+def _job(fml: str, name: str, se: str) -> str:
+    """Return the R code that reads a cached dataset and runs feols on it."""
+    return f'frame <- readRDS("/cache/{name}"); feols({fml}, frame, se="{se}")'
+
+
 def reg(fml: str, data: pd.DataFrame, se: str = "hetero", no_cache: bool = False):
     """Run a feols regression on a container and return the summary."""
+    columns = _columns(fml, data)
+    if worker is not None and store is not None and not no_cache:
+        return worker.run(_job(fml, store.put(data[columns]), se))
+
     if config.container_path is None:
         raise RuntimeError("No R container specified.")
 
     cache_dir = None
-    if config.cache_path is None or no_cache:
+    if store is None or no_cache:
         cache_dir = tempfile.TemporaryDirectory()
-        cache_path = Path(cache_dir.name)
+        dataset_store = DatasetStore(Path(cache_dir.name))
     else:
-        cache_path = config.cache_path
-
-    columns = list(set(re.findall(r"[\w']+", fml)))
-    df = data[columns]
-    df_hash = "_".join(pd.util.hash_pandas_object(df).astype(str))
+        dataset_store = store
 
-    out_path = cache_path / f"{df_hash}.csv"
-    if not out_path.exists():
-        df.to_csv(out_path)
+    name = dataset_store.put(data[columns])
 
-    r_string = f'library(fixest); frame <- read.csv("/cache/{df_hash}.csv"); feols({fml}, frame, se="{se}")'
+    r_string = "library(fixest); " + _job(fml, name, se)
     feols_result = subprocess.check_output(
         [
             "singularity",
             "exec",
             "--bind",
-            f"{cache_path}:/cache",
+            f"{dataset_store.path}:/cache",
             config.container_path,
             "Rscript",
             "-e",
@@ -0,0 +1,379 @@
+"""Out-of-core aggregation of parquet datasets and chunked data."""
+
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from nostocalean.flavor import trim_periods
+
+# Partial aggregates and how partials of the same cell are merged
+PARTIALS = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+AGGREGATES = ["sum", "count", "mean", "min", "max"]
+
+
+class StreamingTimeSeries:
+    """Mergeable per-(period, group) aggregates of a column in a parquet dataset.
+
+    Row groups are read in parallel with only the x, y and group columns, and each
+    is reduced to per-cell sum, count, min and max, which are merged exactly. Partials
+    are kept per file, so update only reads files that are new or changed (by size
+    or mtime) since the last update of that dataset, and drops those removed.
+    Aggregates can then be trimmed like tsg, or resampled like tsgr when x is a
+    timestamp floored to granularity (exact for resample windows that are multiples
+    of it).
+    """
+
+    def __init__(
+        self,
+        x: str,
+        y: str,
+        group: str,
+        granularity: Optional[str] = None,
+        n_jobs: Optional[int] = None,
+    ):
+        self.x = x
+        self.y = y
+        self.group = group
+        self.granularity = granularity
+        self.n_jobs = n_jobs
+        self.partials: Optional[pd.DataFrame] = None
+        self.files: Dict[str, dict] = {}  # Dataset -> file -> (size, mtime, partials)
+
+    @property
+    def scanned(self) -> set:
+        """Return the paths of the files whose partials are held."""
+        return {file for files in self.files.values() for file in files}
+
+    def _partial(self, fragment, schema) -> pd.DataFrame:
+        """Reduce one row group to partial aggregates."""
+        df = fragment.to_table(
+            columns=[self.x, self.y, self.group], schema=schema
+        ).to_pandas()
+        if self.granularity is not None:
+            df[self.x] = df[self.x].dt.floor(self.granularity)
+        return df.groupby([self.x, self.group], observed=True)[self.y].agg(
+            list(PARTIALS)
+        )
+
+    @staticmethod
+    def _merge(partials: List[pd.DataFrame]) -> pd.DataFrame:
+        """Merge partial aggregates of the same cells."""
+        return pd.concat(partials).groupby(level=[0, 1], observed=True).agg(PARTIALS)
+
+    def update(self, path: str) -> "StreamingTimeSeries":
+        """Scan the files of a (hive-partitioned) parquet dataset changed since the last update."""
+        import pyarrow.dataset as ds  # pylint: disable=import-outside-toplevel
+
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        fragments = list(dataset.get_fragments())
+        infos = dataset.filesystem.get_file_info([f.path for f in fragments])
+        versions = {info.path: (info.size, info.mtime_ns) for info in infos}
+
+        files = self.files.get(str(path), {})
+        kept = {
+            file: scanned
+            for file, scanned in files.items()
+            if versions.get(file) == scanned[:2]
+        }
+        fragments = [f for f in fragments if f.path not in kept]
+        row_groups = [(f.path, rg) for f in fragments for rg in f.split_by_row_group()]
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            partials = list(
+                pool.map(
+                    lambda item: self._partial(item[1], dataset.schema), row_groups
+                )
+            )
+        by_file = defaultdict(list)
+        for (file, _), partial in zip(row_groups, partials):
+            by_file[file].append(partial)
+        for file, parts in by_file.items():
+            kept[file] = (*versions[file], self._merge(parts))
+        self.files[str(path)] = kept
+
+        merged = [
+            scanned[2] for files in self.files.values() for scanned in files.values()
+        ]
+        self.partials = self._merge(merged) if merged else None
+        return self
+
+    @staticmethod
+    def _finalize(partials: pd.DataFrame, agg: str) -> pd.Series:
+        """Return an aggregate from merged partials."""
+        if agg not in AGGREGATES:
+            raise ValueError(
+                f"Streaming aggregation supports {AGGREGATES}, not {agg!r}."
+            )
+        if agg == "mean":
+            return partials["sum"] / partials["count"]
+        return partials[agg]
+
+    def _cells(self) -> pd.DataFrame:
+        """Return the merged partials indexed by x and group."""
+        if self.partials is None:
+            raise ValueError("No data has been scanned; call update first.")
+        return self.partials.rename_axis([self.x, self.group])
+
+    def tsg(self, agg: str = "sum", i: int = 1, e: int = 1) -> pd.DataFrame:
+        """Return the grouped time series, as tsg on the full dataset would."""
+        series = self._finalize(self._cells(), agg).rename(self.y).reset_index()
+        return trim_periods(series, self.x, self.group, i, e)
+
+    def tsgr(
+        self, agg: str = "sum", resample: str = "4W", i: int = 1, e: int = 1
+    ) -> pd.DataFrame:
+        """Return the resampled grouped time series, as tsgr on the full dataset would."""
+        resampler = (
+            self._cells()
+            .reset_index()
+            .set_index(self.x)
+            .groupby(self.group)
+            .resample(resample)
+        )
+        resampled = pd.DataFrame(
+            {column: resampler[column].agg(how) for column, how in PARTIALS.items()}
+        )
+        series = self._finalize(resampled, agg).rename(self.y).reset_index()
+        return trim_periods(series, self.x, self.group, i, e)
+
+
+def tsg_parquet(
+    path: str,
+    x: str,
+    y: str,
+    group: str,
+    agg: str = "sum",
+    i: int = 1,
+    e: int = 1,
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Return a grouped time series of a parquet dataset, reading it by row group."""
+    return StreamingTimeSeries(x, y, group, n_jobs=n_jobs).update(path).tsg(agg, i, e)
+
+
+def tsgr_parquet(
+    path: str,
+    x: str,
+    y: str,
+    group: str,
+    agg: str = "sum",
+    resample: str = "4W",
+    i: int = 1,
+    e: int = 1,
+    granularity: str = "D",
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Return a resampled grouped time series of a parquet dataset, reading it by row group."""
+    stream = StreamingTimeSeries(x, y, group, granularity, n_jobs).update(path)
+    return stream.tsgr(agg, resample, i, e)
+
+
+class Moments:
+    """Mergeable count, mean, variance, min and max of a column (Welford/Chan updates)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def merge(self, n: int, mean: float, m2: float, low: float, high: float) -> None:
+        """Fold in the moments of another batch of values."""
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta**2 * self.n * n / total
+        self.n = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in an array of non-missing values."""
+        if len(values):
+            mean = values.mean()
+            m2 = np.sum((values - mean) ** 2)
+            self.merge(len(values), mean, m2, values.min(), values.max())
+
+    @property
+    def std(self) -> float:
+        """Return the sample standard deviation."""
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch with a tracked rank error bound.
+
+    Values are kept in levels, where a value at level h stands for 2^h inputs. A
+    level holding more than k values is compacted: it is sorted and every other
+    value, from a random offset, is promoted to the next level. A compaction at
+    level h moves the rank of any value by at most 2^h, so error accumulates these
+    to give a deterministic bound: every quantile returned has a rank within
+    rank_error() * n of the requested one. The bound grows like log2(n / k) / k
+    (about 0.8% for k = 2048 and n = 1e8). With random offsets, errors cancel, so
+    the typical error is closer to 1 / k. Memory is at most k values per level.
+    """
+
+    def __init__(self, k: int = 2048, seed: Optional[int] = None):
+        self.k = k
+        self.levels: List[np.ndarray] = []
+        self.n = 0
+        self.error = 0
+        self.rng = np.random.default_rng(seed)
+
+    def _add(self, h: int, values: np.ndarray) -> None:
+        if h == len(self.levels):
+            self.levels.append(values)
+        else:
+            self.levels[h] = np.concatenate([self.levels[h], values])
+
+    def _compress(self) -> None:
+        """Compact every level holding more than k values, from the bottom up."""
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.k:
+                level = np.sort(level)
+                held = len(level) % 2  # An odd value out stays at this level
+                self.levels[h] = level[len(level) - held :]
+                self._add(h + 1, level[self.rng.integers(2) : len(level) - held : 2])
+                self.error += 2**h
+            h += 1
+
+    def update(self, values: np.ndarray) -> None:
+        """Add an array of non-missing values."""
+        self.n += len(values)
+        self._add(0, values)
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Fold in another sketch."""
+        for h, level in enumerate(other.levels):
+            self._add(h, level)
+        self.n += other.n
+        self.error += other.error
+        self._compress()
+
+    def rank_error(self) -> float:
+        """Return the bound on the rank error of quantiles, as a fraction of n."""
+        return self.error / self.n if self.n else 0.0
+
+    def quantile(self, q) -> np.ndarray:
+        """Return approximate quantiles."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2**h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(values)
+        ranks = np.cumsum(weights[order])
+        positions = np.searchsorted(ranks, np.asarray(q) * self.n, side="left")
+        return values[order][np.minimum(positions, len(values) - 1)]
+
+
+class StreamingSummary:
+    """One-pass, mergeable describe of the numeric columns of chunked data."""
+
+    def __init__(
+        self, k: int = 2048, seed: Optional[int] = None, n_jobs: Optional[int] = None
+    ):
+        self.k = k
+        self.seed = seed
+        self.n_jobs = n_jobs
+        self.columns = {}
+
+    def _update_column(self, column, series: pd.Series) -> None:
+        if column not in self.columns:
+            self.columns[column] = (Moments(), QuantileSketch(self.k, self.seed))
+        moments, sketch = self.columns[column]
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        moments.update(values)
+        sketch.update(values)
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingSummary":
+        """Fold in a chunk, summarizing its columns in parallel."""
+        numeric = chunk.select_dtypes("number")
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            list(
+                pool.map(
+                    lambda column: self._update_column(column, numeric[column]),
+                    numeric.columns,
+                )
+            )
+        return self
+
+    def merge(self, other: "StreamingSummary") -> "StreamingSummary":
+        """Fold in the summary of other data."""
+        for column, (moments, sketch) in other.columns.items():
+            if column not in self.columns:
+                self.columns[column] = (Moments(), QuantileSketch(self.k, self.seed))
+            mine, my_sketch = self.columns[column]
+            mine.merge(moments.n, moments.mean, moments.m2, moments.min, moments.max)
+            my_sketch.merge(sketch)
+        return self
+
+    def describe(self, percentiles=None) -> pd.DataFrame:
+        """Return a table laid out like pandas describe, with a rank_error row."""
+        percentiles = np.array(
+            [0.25, 0.5, 0.75] if percentiles is None else percentiles
+        )
+        labels = [f"{p * 100:g}%" for p in percentiles]
+        table = {}
+        for column, (moments, sketch) in self.columns.items():
+            quantiles = sketch.quantile(percentiles)
+            table[column] = [
+                moments.n,
+                moments.mean if moments.n else np.nan,
+                moments.std,
+                moments.min if moments.n else np.nan,
+                *quantiles,
+                moments.max if moments.n else np.nan,
+                sketch.rank_error(),
+            ]
+        index = ["count", "mean", "std", "min", *labels, "max", "rank_error"]
+        return pd.DataFrame(table, index=index)
+
+
+def _chunks(data, columns: Optional[List[str]]) -> Iterator[pd.DataFrame]:
+    """Iterate over a dataframe, an iterable of dataframes, or parquet row groups."""
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if isinstance(data, pd.DataFrame):
+        yield data if columns is None else data[columns]
+        return
+    if isinstance(data, (str, os.PathLike)) or (
+        isinstance(data, list) and all(isinstance(p, (str, os.PathLike)) for p in data)
+    ):
+        import pyarrow.dataset as ds  # pylint: disable=import-outside-toplevel
+
+        dataset = ds.dataset(data, format="parquet", partitioning="hive")
+        for fragment in dataset.get_fragments():
+            for row_group in fragment.split_by_row_group():
+                yield row_group.to_table(
+                    columns=columns, schema=dataset.schema
+                ).to_pandas()
+        return
+    for chunk in data:
+        yield chunk if columns is None else chunk[columns]
+
+
+def desc(
+    data,
+    increment: float = 0.1,
+    columns: Optional[List[str]] = None,
+    k: int = 2048,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> pd.DataFrame:
+    """Describe a dataframe, iterable of chunks or parquet path(s) in one pass, like flavor.desc."""
+    summary = StreamingSummary(k, seed, n_jobs)
+    for chunk in _chunks(data, columns):
+        summary.update(chunk)
+    return summary.describe(np.arange(increment, 1, increment))
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nostocalean import flavor
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "group": rng.integers(0, 3, n),
+            "x": rng.normal(size=n),
+            "small": rng.normal(size=n).astype("float32"),
+            "count": rng.integers(0, 1000, n),
+            "nullable": pd.array(
+                np.where(rng.random(n) < 0.1, None, rng.integers(-50, 50, n)),
+                dtype="Int64",
+            ),
+        }
+    )
+
+
+def test_winsorize_keeps_dtypes(frame):
+    out = flavor.winsorize(frame, 5, 5, by="group")
+    pd.testing.assert_series_equal(out.dtypes, frame.dtypes)
+    for _, group in out.groupby("group"):
+        original = frame.loc[group.index]
+        for column in ["x", "small"]:
+            low, high = np.percentile(original[column], [5, 95])
+            expected = original[column].clip(low, high)
+            np.testing.assert_allclose(group[column], expected, rtol=1e-6)
+        low, high = np.percentile(original["count"], [5, 95])
+        assert group["count"].min() == round(low)
+        assert group["count"].max() == round(high)
+    assert out["nullable"].isna().sum() == frame["nullable"].isna().sum()
+    assert frame["nullable"].min() < out["nullable"].min()
+
+
+def test_winsorize_inplace(frame):
+    expected = flavor.winsorize(frame, 1, 1)
+    assert flavor.winsorize(frame, 1, 1, inplace=True) is None
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_winsorize_sample_leaves_unsampled_groups(frame):
+    frame.loc[0, "group"] = 3  # A group of one row, which the sample misses
+    frame.loc[0, "x"] = 100.0
+    out = flavor.winsorize(frame, 1, 1, by="group", sample=500, seed=1)
+    assert out.loc[0, "x"] == 100.0
+    assert out.loc[frame["group"] != 3, "x"].max() < frame["x"].drop(0).max()
+
+
+def test_shrink():
+    df = pd.DataFrame(
+        {
+            "small": np.arange(100, dtype=np.int64),
+            "negative": np.arange(-50, 50, dtype=np.int64),
+            "unsigned": np.arange(100, dtype=np.uint64),
+            "exact": np.arange(100, dtype=np.float64) / 2,
+            "inexact": np.linspace(0, 1, 100),
+            "missing": np.where(np.arange(100) % 10, np.arange(100), np.nan),
+            "large": np.where(np.arange(100) % 10, 2**25 + np.arange(100), np.nan),
+            "label": ["a", "b"] * 50,
+            "unique": [f"id{i}" for i in range(100)],
+        }
+    )
+    out = flavor.shrink(df)
+    assert out.dtypes.astype(str).to_dict() == {
+        "small": "int8",
+        "negative": "int8",
+        "unsigned": "uint8",
+        "exact": "float32",
+        "inexact": "float64",
+        "missing": "Int8",
+        "large": "Int32",
+        "label": "category",
+        "unique": df["unique"].dtype.name,
+    }
+    for column in df.select_dtypes("number"):
+        np.testing.assert_array_equal(
+            out[column].to_numpy(float, na_value=np.nan), df[column].to_numpy(float)
+        )
+    assert out["label"].tolist() == df["label"].tolist()
+    assert flavor.shrink(df, nullable=False)["large"].dtype == np.float64
+    plan = flavor.shrink(df, dry_run=True)
+    assert (plan["gb_after"] <= plan["gb_before"]).all()
+
+
+def test_shrink_keeps_larger_categoricals():
+    df = pd.DataFrame({"label": pd.array(["a", "b"], dtype="string[pyarrow]")})
+    assert flavor.shrink(df, max_unique=1)["label"].dtype == df["label"].dtype
+
+
+@pytest.fixture
+def sales():
+    return pd.DataFrame(
+        {
+            "region": ["north", "north", "south", "a/b c", None],
+            "year": [2023, 2024, 2024, 2024, 2024],
+            "amount": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+
+
+def read(path, **kwargs):
+    df = flavor.read_parquet(str(path), **kwargs)
+    return df.sort_values("amount").reset_index(drop=True)
+
+
+def test_write_parquet_modes(tmp_path, sales):
+    pytest.importorskip("pyarrow")
+    flavor.write_parquet(sales, str(tmp_path), ["region"])
+    flavor.write_parquet(sales.iloc[:2], str(tmp_path), ["region"])
+    assert read(tmp_path)["amount"].tolist() == [1, 1, 2, 2, 3, 4, 5]
+
+    flavor.write_parquet(
+        sales.iloc[:1], str(tmp_path), ["region"], mode="overwrite_partitions"
+    )
+    assert read(tmp_path)["amount"].tolist() == [1, 3, 4, 5]
+
+    flavor.write_parquet(sales.iloc[2:3], str(tmp_path), ["region"], mode="overwrite")
+    assert read(tmp_path)["amount"].tolist() == [3]
+    assert [p.name for p in tmp_path.iterdir()] == ["region=south"]
+
+    with pytest.raises(ValueError, match="partition_cols"):
+        flavor.write_parquet(
+            sales, str(tmp_path / "x.parquet"), mode="overwrite_partitions"
+        )
+
+
+def test_write_parquet_escapes_partition_values(tmp_path, sales):
+    pytest.importorskip("pyarrow")
+    flavor.write_parquet(sales, str(tmp_path), ["region", "year"])
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"region={flavor.HIVE_NULL}",
+        "region=a%2Fb%20c",
+        "region=north",
+        "region=south",
+    ]
+    df = read(tmp_path)
+    assert df["region"].tolist()[:4] == ["north", "north", "south", "a/b c"]
+    assert pd.isna(df["region"].iloc[4])
+
+
+def test_read_parquet_prunes_partitions(tmp_path, sales):
+    pa = pytest.importorskip("pyarrow")
+    flavor.write_parquet(sales, str(tmp_path), ["region"])
+    (corrupt,) = (tmp_path / "region=north").iterdir()
+    corrupt.write_bytes(b"not a parquet file")
+
+    df = read(tmp_path, filters=[("region", "=", "south")], columns=["amount"])
+    assert df.to_dict("list") == {"amount": [3.0]}
+    with pytest.raises(pa.ArrowInvalid):
+        read(tmp_path)
@@ -0,0 +1,109 @@
+"""Offline tests of hf scoring against a tiny local checkpoint."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from nostocalean import hf  # pylint: disable=wrong-import-position
+
+WORDS = "good bad great awful movie film the a is was not very fun boring".split()
+
+
+@pytest.fixture(scope="module")
+def checkpoint(tmp_path_factory) -> str:
+    """Save a randomly initialized two-layer classifier and its tokenizer."""
+    path = tmp_path_factory.mktemp("tiny")
+    vocab = path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    tokenizer = transformers.BertTokenizerFast(str(vocab), model_max_length=64)
+    torch.manual_seed(0)
+    config = transformers.DistilBertConfig(
+        vocab_size=len(WORDS) + 5,
+        dim=32,
+        hidden_dim=64,
+        n_layers=2,
+        n_heads=2,
+        max_position_embeddings=64,
+        num_labels=2,
+    )
+    model = transformers.DistilBertForSequenceClassification(config)
+    model.save_pretrained(path / "model")
+    tokenizer.save_pretrained(path / "model")
+    return str(path / "model")
+
+
+@pytest.fixture(scope="module")
+def model(checkpoint) -> hf.SentimentModel:
+    """Load the tiny checkpoint on the CPU."""
+    return hf.SentimentModel(device="cpu", model_name=checkpoint)
+
+
+def test_score_matches_single_texts(model):
+    texts = pd.Series(
+        [
+            "good movie",
+            "bad film the a is was not very fun",
+            "good movie",
+            None,
+            "awful",
+        ]
+    )
+    scores = model.score(texts, batch_size=2, chunk_size=3)
+    expected = [np.nan if pd.isna(text) else float(model(text)) for text in texts]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_score_missing_chunks(model):
+    scores = model.score([None, np.nan, "good", None], chunk_size=2)
+    assert np.isnan(scores[[0, 1, 3]]).all()
+    assert np.isfinite(scores[2])
+    assert np.isnan(model.score([None, np.nan])).all()
+    assert model.score([]).shape == (0,)
+
+
+def test_prediction_cache(model, tmp_path):
+    cached = hf.SentimentModel(
+        device="cpu", model_name=model.model_name, cache=hf.PredictionCache(tmp_path)
+    )
+    texts = ["good movie", "boring film", "good movie"]
+    first = cached.score(texts)
+    second = cached.score(texts + ["not fun"])
+    np.testing.assert_allclose(second[:3], first)
+    np.testing.assert_allclose(second, model.score(texts + ["not fun"]), rtol=1e-5)
+    assert cached.cache.hits == 2
+
+
+def test_prediction_cache_reloads_evicted_shards(model, tmp_path):
+    cache = hf.PredictionCache(tmp_path)
+    cached = hf.SentimentModel(device="cpu", model_name=model.model_name, cache=cache)
+    texts = ["good movie", "boring film"]
+    cached.score(texts)
+    cached.score(texts)  # Loads the shard into the index
+    (shard,) = tmp_path.glob("*.scores")
+    shard.unlink()  # Evicted
+
+    cached.score(texts)
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert [path.name for path in tmp_path.glob("*.scores")] == [shard.name]
+    cached.score(texts)
+    assert cache.hits == 4
+
+
+def test_optimized(model):
+    texts = ["good movie", "boring film"]
+    optimized = model.optimized(threads=1)
+    assert optimized.mode == "int8"
+    np.testing.assert_allclose(optimized.score(texts), model.score(texts), atol=0.05)
+
+
+def test_optimized_without_quantization(model, monkeypatch):
+    monkeypatch.delattr(torch.ao.quantization, "quantize_dynamic")
+    with pytest.warns(UserWarning, match="quantize=False"):
+        optimized = model.optimized()
+    assert optimized.mode == "fp32-inference"
+    np.testing.assert_allclose(
+        optimized.score(["good movie"]), model.score(["good movie"]), rtol=1e-5
+    )
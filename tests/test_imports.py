@@ -0,0 +1,40 @@
+"""Regression tests of import time and lazily imported dependencies."""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ["torch", "transformers", "sklearn", "matplotlib", "seaborn", "rpy2", "scipy"]
+BUDGET = 0.5  # Seconds to import nostocalean modules on top of pandas
+
+SCRIPT = """
+import json, sys, time
+import numpy, pandas, pandas_flavor
+start = time.perf_counter()
+import nostocalean.hf, nostocalean.nt, nostocalean.est
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_imports_are_lazy():
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT], check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    loaded = {name.split(".")[0] for name in result["modules"]}
+    assert not loaded & set(HEAVY)
+    assert result["seconds"] < BUDGET
+
+
+def test_torch_subclasses():
+    torch = pytest.importorskip("torch")
+    from nostocalean import hf  # pylint: disable=import-outside-toplevel
+
+    sampler = hf.LengthGroupedBatchSampler([3, 1, 2, 5], batch_size=2, shuffle=False)
+    assert isinstance(sampler, torch.utils.data.Sampler)
+    assert sorted(sum(list(sampler), [])) == [0, 1, 2, 3]
+    assert issubclass(hf.ClassificationDataset, torch.utils.data.Dataset)
+    assert hf.ClassificationDataset.__module__ == "nostocalean.hf"
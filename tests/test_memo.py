@@ -0,0 +1,68 @@
+import pathlib
+
+import pandas as pd
+import pytest
+
+from nostocalean.est import memo, numpy_did, numpy_fixest
+
+DATA = pathlib.Path(__file__).parent / "data"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return memo.ResultCache(str(tmp_path / "results"))
+
+
+def memoize(cache, function, data, estimate, payload):
+    calls = []
+
+    def counted():
+        calls.append(1)
+        return estimate()
+
+    result = cache.memoize(function, "fml", data, list(data), {}, counted, payload)
+    return result, calls
+
+
+def test_fixest_hit_falls_back_for_other_vcovs(cache):
+    data = pd.read_csv(DATA / "panel.csv")
+    fml = "y ~ x1 + x2 | f1"
+
+    def estimate():
+        return numpy_fixest.feols(fml, data, cluster="~f1")
+
+    live, calls = memoize(cache, "feols", data, estimate, memo.fixest_payload)
+    assert len(calls) == 1
+    cached, calls = memoize(cache, "feols", data, estimate, memo.fixest_payload)
+    assert isinstance(cached, memo.CachedResult)
+    pd.testing.assert_frame_equal(cached.get_table(), live.get_table())
+    assert cached.summary() == live.summary()
+    assert cached.coefnames == live.coefnames
+    assert not calls
+
+    pd.testing.assert_frame_equal(
+        cached.get_table(vcov="hetero"), live.get_table(vcov="hetero")
+    )
+    assert cached.summary(vcov="iid") == live.summary(vcov="iid")
+    assert cached.fixef == ["f1"]
+    assert len(calls) == 1
+
+
+def test_did_payload_stores_computed_aggregations(cache):
+    data = pd.read_csv(DATA / "mpdta.csv")
+
+    def estimate():
+        return numpy_did.att_gt(
+            "lemp", "first.treat", "countyreal", "year", data, seed=0
+        )
+
+    live, _ = memoize(cache, "att_gt", data, estimate, memo.did_payload)
+    cached, calls = memoize(cache, "att_gt", data, estimate, memo.did_payload)
+    assert set(cached.payload["tables"]) == {"dynamic"}
+    pd.testing.assert_frame_equal(cached.get_table(), live.get_table())
+    assert cached.es_summary() == live.es_summary()
+    assert not calls
+
+    pd.testing.assert_frame_equal(cached.get_table("group"), live.get_table("group"))
+    assert cached.pretest() == live.pretest()
+    assert len(calls) == 1
@@ -0,0 +1,71 @@
+import json
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nostocalean.est import numpy_did
+
+DATA = pathlib.Path(__file__).parent / "data"
+REFERENCE = json.loads((DATA / "did_mpdta.json").read_text())
+
+
+@pytest.fixture(scope="module")
+def mpdta():
+    return pd.read_csv(DATA / "mpdta.csv")
+
+
+def att_gt(data, **kwargs):
+    return numpy_did.att_gt(
+        "lemp", "first.treat", "countyreal", "year", data, seed=0, **kwargs
+    )
+
+
+@pytest.mark.parametrize("xformla", ["~1", "~lpop"])
+def test_att_gt_matches_did(mpdta, xformla):
+    result = att_gt(mpdta, xformla=xformla)
+    expected = REFERENCE["att_gt"]
+    np.testing.assert_array_equal(result.table["group"], expected["group"])
+    np.testing.assert_array_equal(result.table["time"], expected["time"])
+    np.testing.assert_allclose(result.table["estimate"], expected[xformla], atol=5e-5)
+    method = "Doubly Robust" if xformla == "~lpop" else "Difference in Means"
+    assert result.est_method == method
+
+
+@pytest.mark.parametrize("type_", list(numpy_did.AGGREGATIONS))
+def test_aggregations_match_did(mpdta, type_):
+    table = att_gt(mpdta).get_table(type_)
+    expected = REFERENCE["aggte"][type_]
+    overall = table.attrs["overall"]["estimate"].iloc[0]
+    assert overall == pytest.approx(expected["overall"], abs=5e-5)
+    if numpy_did.AGGREGATIONS[type_] is not None:
+        labels = table[numpy_did.AGGREGATIONS[type_]]
+        np.testing.assert_array_equal(labels, expected["labels"])
+    np.testing.assert_allclose(table["estimate"], expected["estimates"], atol=5e-5)
+
+
+def test_bootstrap_matches_analytic_standard_errors(mpdta):
+    result = att_gt(mpdta, covariates=["lpop"])
+    analytic = np.sqrt(result.inffunc.multiply(result.inffunc).sum(axis=0)) / result.n
+    np.testing.assert_allclose(result.table["se"], np.ravel(analytic), rtol=0.1)
+
+
+def test_outcome_regression(mpdta):
+    dr = att_gt(mpdta, covariates=["lpop"])
+    reg = att_gt(mpdta, covariates=["lpop"], est_method="reg")
+    assert reg.est_method == "Outcome Regression"
+    np.testing.assert_allclose(reg.att, dr.att, atol=2e-3)
+    assert not np.allclose(reg.att, dr.att, atol=1e-6)
+
+
+def test_did_arguments(mpdta):
+    result = att_gt(mpdta, clustervars=["countyreal"], biters=200, bstrap=True)
+    assert result.unit_cluster is None
+    assert result.bootstrap["B"] == 200
+    with pytest.raises(ValueError, match="ipw"):
+        att_gt(mpdta, est_method="ipw")
+    with pytest.raises(ValueError, match="bstrap=False"):
+        att_gt(mpdta, bstrap=False)
+    with pytest.raises(TypeError, match="anticipation"):
+        att_gt(mpdta, anticipation=1)
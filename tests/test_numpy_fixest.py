@@ -0,0 +1,63 @@
+import json
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nostocalean.est import numpy_fixest
+
+DATA = pathlib.Path(__file__).parent / "data"
+REFERENCE = json.loads((DATA / "fixest_panel.json").read_text())
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return pd.read_csv(DATA / "panel.csv")
+
+
+def dummies(panel, *columns):
+    return [pd.get_dummies(panel[c], drop_first=True, dtype=float) for c in columns]
+
+
+@pytest.mark.parametrize(
+    "fml, fixef",
+    [
+        ("y ~ x1 + x2", ()),
+        ("y ~ x1 + x2 | f1", ("f1",)),
+        ("y ~ x1 | f1 + f2", ("f1", "f2")),
+    ],
+)
+def test_matches_dummy_variable_ols(panel, fml, fixef):
+    result = numpy_fixest.feols(fml, panel, vcov="iid")
+    regressors = [c for c in ("x1", "x2") if c in fml]
+    X = pd.concat(
+        [pd.Series(1.0, index=panel.index, name="(Intercept)"), panel[regressors]]
+        + dummies(panel, *fixef),
+        axis=1,
+    ).to_numpy(float)
+    coef, *_ = np.linalg.lstsq(X, panel["y"].to_numpy(), rcond=None)
+    resid = panel["y"].to_numpy() - X @ coef
+    vcov = resid @ resid / (len(X) - X.shape[1]) * np.linalg.inv(X.T @ X)
+    # With fixed effects the intercept is absorbed and not reported
+    columns = slice(1 if fixef else 0, 1 + len(regressors))
+    np.testing.assert_allclose(result.coef, coef[columns], rtol=1e-6)
+    np.testing.assert_allclose(
+        result.coeftable()["se"], np.sqrt(np.diag(vcov))[columns], rtol=1e-6
+    )
+
+
+def test_intercept_comes_first(panel):
+    result = numpy_fixest.feols("y ~ x1 + x2", panel)
+    assert result.coefnames == ["(Intercept)", "x1", "x2"]
+    assert list(numpy_fixest.feols("y ~ x1 - 1", panel).coefnames) == ["x1"]
+
+
+@pytest.mark.parametrize(
+    "model", REFERENCE["models"], ids=lambda m: f"{m['fml']} {m['kwargs']}"
+)
+def test_matches_fixest_standard_errors(panel, model):
+    table = numpy_fixest.feols(model["fml"], panel, **model["kwargs"]).coeftable()
+    assert list(table.index) == model["coefnames"]
+    np.testing.assert_allclose(table["coef"], model["coef"], rtol=1e-7)
+    np.testing.assert_allclose(table["se"], model["se"], rtol=1e-6)
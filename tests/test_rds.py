@@ -0,0 +1,57 @@
+"""Tests of the RDS writer, read back with the rdata parser."""
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nostocalean.rds import write_rds
+
+rdata = pytest.importorskip("rdata")
+pytestmark = pytest.mark.filterwarnings("ignore:Unknown file type")
+
+
+def _rds(df: pd.DataFrame) -> bytes:
+    """Return the RDS file of a dataframe."""
+    buffer = io.BytesIO()
+    write_rds(df, buffer)
+    return buffer.getvalue()
+
+
+def read_rds(df: pd.DataFrame) -> pd.DataFrame:
+    """Write a dataframe as RDS and read it back as rdata converts R objects."""
+    return rdata.conversion.convert(rdata.parser.parse_data(_rds(df)))
+
+
+def test_round_trip():
+    df = pd.DataFrame(
+        {
+            "y": [1.5, np.nan, 3.0],
+            "i": [1, 2, 3],
+            "nullable": pd.array([1, None, 3], dtype="Int64"),
+            "big": [1, 2, 10**12],
+            "b": pd.array([True, None, False], dtype="boolean"),
+            "s": ["a", None, "é"],
+            "c": pd.Categorical(["x", "y", None]),
+            "x y": [0, 0, 0],
+        }
+    )
+    out = read_rds(df).reset_index(drop=True)
+    assert list(out.columns) == list(df.columns)
+    np.testing.assert_array_equal(out["y"], df["y"])
+    assert out["i"].tolist() == [1, 2, 3]
+    assert out["nullable"].isna().tolist() == [False, True, False]
+    assert out["big"].tolist() == [1.0, 2.0, 1e12]
+    assert out["b"].isna().tolist() == [False, True, False] and out["b"][0]
+    assert out["s"].isna().tolist() == [False, True, False] and out["s"][2] == "é"
+    assert list(out["c"].cat.categories) == ["x", "y"] and pd.isna(out["c"][2])
+
+
+@pytest.mark.filterwarnings("ignore:Missing constructor")
+def test_datetimes_are_posixct_seconds():
+    df = pd.DataFrame({"t": pd.to_datetime(["2020-01-01", None])})
+    parsed = rdata.parser.parse_data(_rds(df))
+    column = parsed.object.value[0]
+    assert column.value[0] == pd.Timestamp("2020-01-01").timestamp()
+    assert np.isnan(column.value[1])
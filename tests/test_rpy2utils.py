@@ -0,0 +1,61 @@
+"""Tests of the NumPy conversion of R objects, skipped without rpy2 and R."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("rpy2")
+
+try:
+    from rpy2 import rinterface
+
+    from nostocalean import rpy2utils
+except Exception:  # pylint: disable=broad-except
+    pytest.skip("R is not available", allow_module_level=True)
+
+
+def evalr(code: str):
+    """Evaluate R code, returning the unconverted R object."""
+    return rinterface.evalr(code)
+
+
+def test_to_array():
+    np.testing.assert_array_equal(rpy2utils._to_array(evalr("c(1L, NA)")), [1, np.nan])
+    logical = rpy2utils._to_array(evalr("c(TRUE, FALSE)"))
+    assert logical.dtype == bool and logical.tolist() == [True, False]
+    assert np.isnan(rpy2utils._to_array(evalr("c(TRUE, NA)"))[1])
+    factor = rpy2utils._to_array(evalr("factor(c('a', 'b', NA))"))
+    assert isinstance(factor, pd.Categorical)
+    assert factor.tolist()[:2] == ["a", "b"] and pd.isna(factor[2])
+    assert rpy2utils._to_array(evalr("c('x', NA)")).tolist() == ["x", None]
+
+
+def test_to_numpy_scalars():
+    assert rpy2utils.to_numpy(evalr("'x'")) == "x"
+    assert rpy2utils.to_numpy(evalr("NA_character_")) is None
+    assert rpy2utils.to_numpy(evalr("2.5")) == 2.5
+    assert rpy2utils.to_numpy(evalr("3L")) == 3
+    assert rpy2utils.to_numpy(evalr("TRUE")) is True
+
+
+def test_to_numpy_shapes():
+    series = rpy2utils.to_numpy(evalr("c(a = 1, b = 2)"))
+    pd.testing.assert_series_equal(series, pd.Series([1.0, 2.0], index=["a", "b"]))
+    frame = rpy2utils.to_numpy(
+        evalr("matrix(1:4, 2, dimnames = list(c('r1', 'r2'), c('c1', 'c2')))")
+    )
+    assert frame.loc["r2", "c1"] == 2 and frame.loc["r1", "c2"] == 3
+    assert rpy2utils.to_numpy(evalr("matrix(1:6, 2)")).shape == (2, 3)
+
+
+def test_convert_numpy():
+    sexp = evalr(
+        "list(a = 1, b = list(c = 'x', d = 1:3), e = data.frame(x = 1:2), f = NULL)"
+    )
+    result = rpy2utils.convert_numpy(sexp)
+    assert result["a"] == 1 and result["b"]["c"] == "x" and result["f"] is None
+    np.testing.assert_array_equal(result["b"]["d"], [1, 2, 3])
+    assert result["e"]["x"].tolist() == [1, 2]
+    assert rpy2utils.convert_numpy(sexp, fields=["b$c", "a"]) == {"b$c": "x", "a": 1}
+    with pytest.raises(KeyError):
+        rpy2utils.convert_numpy(sexp, fields=["b$z"])
@@ -0,0 +1,146 @@
+"""Tests of the R worker protocol against a Python stand-in for the R server."""
+
+import asyncio
+import re
+import sys
+
+import pandas as pd
+import pytest
+
+from nostocalean import sest
+
+STANDIN = f"""
+import os, re, sys, time
+
+for line in sys.stdin:
+    line = line.rstrip("\\n")
+    pause = re.search(r"sleep\\(([\\d.]+)\\)", line)
+    if pause:
+        time.sleep(float(pause.group(1)))
+    once = re.search(r"crash_once\\((.+?)\\)", line)
+    if once and not os.path.exists(once.group(1)):
+        open(once.group(1), "w").close()
+        os._exit(3)
+    if "crash" in line and not once:
+        os._exit(3)
+    if "fail" in line:
+        print("Error: boom")
+        print({sest.ERROR_SENTINEL!r}, flush=True)
+        continue
+    print("pid", os.getpid())
+    print("job", line)
+    print({sest.OK_SENTINEL!r}, flush=True)
+"""
+
+
+@pytest.fixture
+def command(tmp_path):
+    path = tmp_path / "standin.py"
+    path.write_text(STANDIN)
+    return [sys.executable, "-u", str(path)]
+
+
+@pytest.fixture
+def worker(command):
+    with sest.RWorker(command, max_restarts=1) as r_worker:
+        yield r_worker
+
+
+def pid(output: str) -> int:
+    return int(re.search(r"pid (\d+)", output).group(1))
+
+
+def test_ok_and_error_sentinels(worker):
+    output = worker.run("1 + 1")
+    assert output.endswith("job 1 + 1\n")
+    assert list(worker.stream("2 + 2"))[1] == "job 2 + 2"
+    with pytest.raises(RuntimeError, match="boom"):
+        worker.run("fail()")
+    assert pid(worker.run("3")) == pid(output)  # Errors do not restart the worker
+    with pytest.raises(ValueError):
+        worker.run("1\n2")
+
+
+def test_restarts_after_crash(worker, tmp_path):
+    first = pid(worker.run("1"))
+    output = worker.run(f"crash_once({tmp_path / 'crashed'})")
+    assert pid(output) != first
+    assert worker.restarts == 0
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        worker.run("crash()")
+    assert worker.run("2").endswith("job 2\n")
+
+
+def test_timeout_kills_and_restarts(worker):
+    first = pid(worker.run("1"))
+    with pytest.raises(TimeoutError):
+        worker.run("sleep(10)", timeout=0.5)
+    output = worker.run("sleep(0.1)", timeout=5)
+    assert pid(output) != first
+    assert output.endswith("job sleep(0.1)\n")
+
+
+def test_abandoned_stream_does_not_leak_output(worker):
+    lines = worker.stream("first")
+    first = pid(next(lines))
+    lines.close()
+    assert worker.process is None
+    output = worker.run("second")
+    assert pid(output) != first
+    assert output.endswith("job second\n")
+
+
+@pytest.fixture
+def pool(command, tmp_path, monkeypatch):
+    monkeypatch.setattr(sest, "store", sest.DatasetStore(tmp_path / "datasets"))
+    with sest.WorkerPool(2, command) as worker_pool:
+        yield worker_pool
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({"y": [1.0, 2.0, 3.0], "x": [0.5, 0.1, 0.2], "z": [1, 2, 3]})
+
+
+def dataset(output: str) -> str:
+    return re.search(r'readRDS\("/cache/(\w+\.rds)"\)', output).group(1)
+
+
+def test_submit_many_writes_each_dataset_once(pool, data):
+    jobs = [("y ~ x", data), ("y ~ x", data, "iid"), ("y ~ z", data)]
+    outputs = [future.result() for future in pool.submit_many(jobs)]
+    assert sest.store.hits + sest.store.misses == 2  # One lookup per dataset
+    assert dataset(outputs[0]) == dataset(outputs[1]) != dataset(outputs[2])
+    assert 'se="iid"' in outputs[1]
+    assert len(list(sest.store.path.glob("*.rds"))) == 2
+
+
+def test_as_completed_yields_in_completion_order(pool, data):
+    jobs = [("y ~ x + sleep(1)", data), ("y ~ x", data)]
+    results = list(pool.as_completed(jobs))
+    assert [index for index, _ in results] == [1, 0]
+    assert "sleep(1)" in dict(results)[0]
+
+
+def test_aiter_yields_in_completion_order(pool, data):
+    async def collect():
+        jobs = [("y ~ x + sleep(1)", data), ("y ~ x", data)]
+        return [index async for index, _ in pool.aiter(jobs)]
+
+    assert asyncio.run(collect()) == [1, 0]
+
+
+def test_timeout_applies_per_job(pool, data):
+    slow, fast = pool.submit_many(
+        [("y ~ x + sleep(10)", data), ("y ~ x + sleep(0.2)", data)], timeout=1
+    )
+    assert "sleep(0.2)" in fast.result()
+    with pytest.raises(TimeoutError):
+        slow.result()
+    assert "job" in pool.submit("y ~ x", data).result()
+
+
+def test_errors_propagate(pool, data):
+    with pytest.raises(RuntimeError, match="boom"):
+        list(pool.as_completed([("y ~ x + sleep(0.5)", data), ("y ~ fail", data)]))
+    assert "job" in pool.submit("y ~ x", data).result()
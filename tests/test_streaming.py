@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from nostocalean import flavor, streaming  # pylint: disable=wrong-import-position
+
+AGGS = ["sum", "count", "mean", "min", "max"]
+
+
+def panel(seed: int, n: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "date": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 120, n), unit="D"),
+            "period": rng.integers(0, 12, n),
+            "firm": rng.choice(["a", "b", "c"], n),
+            "sales": rng.normal(size=n),
+        }
+    )
+
+
+def write(df: pd.DataFrame, path) -> None:
+    df.to_parquet(path, index=False, row_group_size=100)
+
+
+def assert_same(result: pd.DataFrame, expected: pd.DataFrame, x: str) -> None:
+    def order(df):
+        return df.sort_values([x, "firm"]).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(
+        order(result), order(expected), check_dtype=False, check_exact=False
+    )
+
+
+@pytest.mark.parametrize("agg", AGGS)
+def test_tsg_matches_dataframe(tmp_path, agg):
+    frames = [panel(0), panel(1)]
+    for k, df in enumerate(frames):
+        write(df, tmp_path / f"part-{k}.parquet")
+    df = pd.concat(frames)
+    result = streaming.tsg_parquet(tmp_path, "period", "sales", "firm", agg)
+    assert_same(result, flavor.tsg(df, "period", "sales", "firm", agg), "period")
+
+
+@pytest.mark.parametrize("agg", AGGS)
+def test_tsgr_matches_dataframe(tmp_path, agg):
+    df = panel(2)
+    write(df, tmp_path / "part.parquet")
+    result = streaming.tsgr_parquet(tmp_path, "date", "sales", "firm", agg, "2W")
+    expected = flavor.tsgr(df, "date", "sales", "firm", agg, "2W")
+    assert_same(result, expected, "date")
+
+
+def test_incremental_updates(tmp_path):
+    stream = streaming.StreamingTimeSeries("period", "sales", "firm")
+    frames = {"part-0.parquet": panel(3)}
+    write(frames["part-0.parquet"], tmp_path / "part-0.parquet")
+
+    def check():
+        stream.update(tmp_path)
+        df = pd.concat(frames.values())
+        for agg in AGGS:
+            expected = flavor.tsg(df, "period", "sales", "firm", agg)
+            assert_same(stream.tsg(agg), expected, "period")
+
+    check()
+    frames["part-1.parquet"] = panel(4)
+    write(frames["part-1.parquet"], tmp_path / "part-1.parquet")
+    check()
+    assert len(stream.scanned) == 2
+
+    frames["part-0.parquet"] = panel(5, n=300)  # Rewritten
+    write(frames["part-0.parquet"], tmp_path / "part-0.parquet")
+    check()
+
+    del frames["part-1.parquet"]  # Removed
+    (tmp_path / "part-1.parquet").unlink()
+    check()
+    assert len(stream.scanned) == 1
+
+
+def rank_errors(sketch: streaming.QuantileSketch, data: np.ndarray) -> np.ndarray:
+    """Return how far the rank of each returned quantile is from the requested one."""
+    q = np.linspace(0, 1, 201)
+    values = sketch.quantile(q)
+    data = np.sort(data)
+    # A returned value covers the ranks from below to through, across its ties
+    below = np.searchsorted(data, values, side="left")
+    through = np.searchsorted(data, values, side="right")
+    target = q * len(data)
+    return np.maximum(0, np.maximum(below - target, target - through)) / len(data)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_quantile_sketch_rank_error_is_bounded(seed):
+    rng = np.random.default_rng(seed)
+    data = np.concatenate([rng.lognormal(size=150_000), rng.integers(0, 50, 50_000)])
+    sketch = streaming.QuantileSketch(k=64, seed=seed)
+    for chunk in np.array_split(data, 37):
+        sketch.update(chunk)
+    assert sketch.n == len(data)
+    assert 0 < sketch.rank_error() < 0.5
+    assert rank_errors(sketch, data).max() <= sketch.rank_error()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_merged_quantile_sketch_rank_error_is_bounded(seed):
+    rng = np.random.default_rng(seed)
+    parts = [
+        rng.normal(loc, size=size)
+        for loc, size in [(0, 80_000), (3, 5_000), (-2, 40_000)]
+    ]
+    merged = streaming.QuantileSketch(k=64, seed=seed)
+    for part in parts:
+        sketch = streaming.QuantileSketch(k=64, seed=seed + 1)
+        for chunk in np.array_split(part, 9):
+            sketch.update(chunk)
+        merged.merge(sketch)
+    data = np.concatenate(parts)
+    assert merged.n == len(data)
+    assert merged.rank_error() > 0
+    assert rank_errors(merged, data).max() <= merged.rank_error()
+
+
+def test_moments_merge_matches_describe():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {"x": rng.normal(5, 2, 10_000), "y": rng.exponential(size=10_000)}
+    )
+    df.loc[::7, "y"] = np.nan
+    chunks = [df.iloc[start : start + 3000] for start in range(0, len(df), 3000)]
+    merged = streaming.StreamingSummary().update(chunks[0])
+    for chunk in chunks[1:]:
+        merged.merge(streaming.StreamingSummary().update(chunk))
+    result = merged.describe()
+    expected = df.describe()
+    for stat in ["count", "mean", "std", "min", "max"]:
+        np.testing.assert_allclose(result.loc[stat], expected.loc[stat], rtol=1e-12)